@@ -13,11 +13,13 @@ import errno
 import json
 import logging
 import os
+import re
 import shutil
 import struct
 import subprocess
 import sys
 import time
+import types
 import typing
 import uuid
 from pathlib import Path
@@ -31,11 +33,13 @@ from typing import (
     Optional,
     Set,
     Tuple,
+    TypeVar,
     Union,
 )
 
 import facebook.eden.ttypes as eden_ttypes
 import toml
+import toml.decoder
 from eden.thrift import legacy
 from eden.thrift.legacy import EdenNotRunningError
 from facebook.eden.ttypes import MountInfo as ThriftMountInfo, MountState
@@ -54,6 +58,28 @@ except ImportError:
     # Thrift-py3 is not supported in the CMake build yet.
     pass
 
+# Prefer the faster tomllib (Python 3.11+) or its tomli backport for
+# parsing; the pure Python toml module is still used for writing TOML, and for
+# parsing in builds where neither of the faster parsers is available.
+# Similarly, tomli_w is preferred for printing the config when it is present.
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+try:
+    import tomli_w
+except ImportError:
+    tomli_w = None
+
+if tomllib is not None:
+    TomlDecodeError = tomllib.TOMLDecodeError
+else:
+    TomlDecodeError = toml.decoder.TomlDecodeError
+
 
 log: logging.Logger = logging.getLogger(__name__)
 
@@ -187,7 +213,21 @@ class EdenInstance:
     modifying the list of checkouts managed by this edenfs instance.
     """
 
-    _telemetry_logger: Optional[telemetry.TelemetryLogger] = None
+    __slots__ = (
+        "_config_dir",
+        "_default_config_variables",
+        "_etc_eden_dir",
+        "_home_dir",
+        "_interpolate_dict",
+        "_loaded_sections",
+        "_rc_file_keys",
+        "_section_parser",
+        "_system_config_path",
+        "_telemetry_logger",
+        "_user_config_path",
+    )
+
+    _telemetry_logger: Optional[telemetry.TelemetryLogger]
     _home_dir: Path
     _user_config_path: Path
     _system_config_path: Path
@@ -198,13 +238,20 @@ class EdenInstance:
         config_dir: Union[Path, str, None],
         etc_eden_dir: Union[Path, str, None],
         home_dir: Union[Path, str, None],
-        interpolate_dict: Optional[Dict[str, str]] = None,
+        interpolate_dict: Optional[Mapping[str, str]] = None,
     ) -> None:
         self._etc_eden_dir = Path(etc_eden_dir or DEFAULT_ETC_EDEN_DIR)
         self._home_dir = Path(home_dir) if home_dir is not None else util.get_home_dir()
         self._user_config_path = self._home_dir / USER_CONFIG
         self._system_config_path = self._etc_eden_dir / SYSTEM_CONFIG
         self._interpolate_dict = interpolate_dict
+        self._telemetry_logger = None
+        self._default_config_variables: Optional[Mapping[str, str]] = None
+        # State for loading individual config sections on demand; see
+        # _ensure_section().
+        self._section_parser: Optional[configutil.EdenConfigParser] = None
+        self._loaded_sections: Set[str] = set()
+        self._rc_file_keys: Tuple[Optional[_TomlFileKey], ...] = ()
 
         # TODO: We should eventually read the default config_dir path from the config
         # files rather than always using ~/local/.eden
@@ -255,7 +302,7 @@ class EdenInstance:
         )
         for path in paths:
             try:
-                toml_cfg = load_toml_config(path)
+                toml_cfg = _load_toml_config_cached(path)
             except FileNotFoundError:
                 # Ignore missing config files. Eg. user_config_path is optional
                 continue
@@ -272,26 +319,81 @@ class EdenInstance:
         """
         return self.read_configs(self.get_rc_files())
 
-    @property
-    def _config_variables(self) -> Dict[str, str]:
-        if sys.platform == "win32":
-            # We don't have user ids on Windows right now.
-            # We should update this code if and when we add user id support.
-            user_id = 0
-            user_name = "USERNAME"
-        else:
-            user_id = os.getuid()
-            user_name = "USER"
+    def _ensure_section(self, section: str) -> configutil.EdenConfigParser:
+        """Return a parser that has loaded the given section from all of the
+        rc files.  Only the rc files that may contain the section are parsed,
+        and each section is loaded at most once while the rc files are
+        unchanged.
+        """
+        rc_files: List[Tuple[Path, Optional[_TomlFileKey]]] = []
+        for path in self.get_rc_files():
+            try:
+                rc_files.append((path, _toml_file_key(path)))
+            except FileNotFoundError:
+                # Ignore missing config files. Eg. user_config_path is optional
+                rc_files.append((path, None))
+        rc_file_keys = tuple(key for _path, key in rc_files)
+        if rc_file_keys != self._rc_file_keys:
+            self._invalidate_section_cache()
+            self._rc_file_keys = rc_file_keys
+
+        parser = self._section_parser
+        if parser is None:
+            parser = configutil.EdenConfigParser(
+                interpolation=configinterpolator.EdenConfigInterpolator(
+                    self._config_variables
+                )
+            )
+            self._section_parser = parser
+        if section in self._loaded_sections:
+            return parser
 
+        for path, key in rc_files:
+            if key is None:
+                continue
+            try:
+                options = _load_toml_section_cached(path, key, section)
+            except FileNotFoundError:
+                # Ignore missing config files. Eg. user_config_path is optional
+                continue
+            if options is not None:
+                parser.read_dict({section: options})
+        self._loaded_sections.add(section)
+        return parser
+
+    def _invalidate_section_cache(self) -> None:
+        self._section_parser = None
+        self._loaded_sections.clear()
+        self._rc_file_keys = ()
+
+    @property
+    def _config_variables(self) -> Mapping[str, str]:
         interpolate_dict = self._interpolate_dict
         if interpolate_dict is not None:
             return interpolate_dict
-        else:
-            return {
-                "USER": os.environ.get(user_name, ""),
-                "USER_ID": str(user_id),
-                "HOME": str(self._home_dir),
-            }
+
+        config_variables = self._default_config_variables
+        if config_variables is None:
+            if sys.platform == "win32":
+                # We don't have user ids on Windows right now.
+                # We should update this code if and when we add user id support.
+                user_id = 0
+                user_name = "USERNAME"
+            else:
+                user_id = os.getuid()
+                user_name = "USER"
+
+            # Computed once per instance and frozen, since it is shared by
+            # every parser that this instance creates.
+            config_variables = types.MappingProxyType(
+                {
+                    "USER": os.environ.get(user_name, ""),
+                    "USER_ID": str(user_id),
+                    "HOME": str(self._home_dir),
+                }
+            )
+            self._default_config_variables = config_variables
+        return config_variables
 
     def get_rc_files(self) -> List[Path]:
         result: List[Path] = []
@@ -379,13 +481,35 @@ class EdenInstance:
         return version.format_eden_version(self.get_running_version_parts())
 
     def get_config_value(self, key: str, default: str) -> str:
-        parser = self._loadConfig()
         section, option = key.split(".", 1)
+        parser = self._ensure_section(section)
         return parser.get_str(section, option, default=default)
 
+    def get_config_values(
+        self, keys: typing.Sequence[str], defaults: Mapping[str, str]
+    ) -> Dict[str, str]:
+        """Look up several string config values at once.
+
+        Each key is of the form "section.option"; keys that are missing from
+        `defaults` default to the empty string.  Every section involved is
+        loaded only once.
+        """
+        sections: Dict[str, configutil.EdenConfigParser] = {}
+        values: Dict[str, str] = {}
+        for key in keys:
+            section, option = key.split(".", 1)
+            parser = sections.get(section)
+            if parser is None:
+                parser = self._ensure_section(section)
+                sections[section] = parser
+            values[key] = parser.get_str(
+                section, option, default=defaults.get(key, "")
+            )
+        return values
+
     def get_config_bool(self, key: str, default: bool) -> bool:
-        parser = self._loadConfig()
         section, option = key.split(".", 1)
+        parser = self._ensure_section(section)
         return parser.get_bool(section, option, default=default)
 
     def should_use_experimental_systemd_mode(self) -> bool:
@@ -400,7 +524,7 @@ class EdenInstance:
         if env_var_value == "0":
             return False
 
-        if self._loadConfig().get_bool(
+        if self._ensure_section("service").get_bool(
             "service", "experimental_systemd", default=False
         ):
             return True
@@ -421,7 +545,10 @@ class EdenInstance:
         data: Dict[str, Mapping[str, str]] = {}
         for section in parser.sections():
             data[section] = parser.get_section_str_to_any(section)
-        out.write(toml.dumps(data).encode())
+        if tomli_w is not None:
+            out.write(tomli_w.dumps(data).encode())
+        else:
+            out.write(toml.dumps(data).encode())
 
     def get_mount_paths(self) -> List[str]:
         """Return the paths of the set mount points stored in config.json"""
@@ -998,6 +1125,7 @@ figure out which process, please try `handle.exe` from sysinternals:
         write_file_atomically(
             self.user_config_path, toml.dumps(config.to_raw_dict()).encode()
         )
+        self._invalidate_section_cache()
 
 
 class EdenCheckout:
@@ -1008,6 +1136,7 @@ class EdenCheckout:
         self.path = path
         self.state_dir = state_dir
         self._config: Optional[CheckoutConfig] = None
+        self._path_str: Optional[str] = None
 
     def __repr__(self) -> str:
         return f"EdenCheckout({self.instance!r}, {self.path!r}, {self.state_dir!r})"
@@ -1073,6 +1202,15 @@ class EdenCheckout:
     def set_config(self, config: CheckoutConfig) -> None:
         self._config = config
 
+    @property
+    def path_str(self) -> str:
+        """The checkout path as a str, computed once and then cached."""
+        path_str = self._path_str
+        if path_str is None:
+            path_str = os.fsdecode(self.path)
+            self._path_str = path_str
+        return path_str
+
     def get_config(self) -> CheckoutConfig:
         config = self._config
         if config is None:
@@ -1470,7 +1608,7 @@ def find_eden(
             curdir = path
             while curdir != curdir.parent:
                 try:
-                    tomlconfig = toml.load(curdir / ".eden" / "config")
+                    tomlconfig = load_toml_config(curdir / ".eden" / "config")
                 except FileNotFoundError:
                     curdir = curdir.parent
                     continue
@@ -1534,24 +1672,28 @@ def find_eden(
 
 
 def eden_instance_from_cmdline(cmdline: List[bytes]) -> EdenInstance:
-    try:
-        eden_dir_idx = cmdline.index(b"--edenDir") + 1
-        eden_dir = Path(cmdline[eden_dir_idx].decode("utf-8"))
-    except ValueError:
-        eden_dir = None
-
-    try:
-        etc_eden_dir_idx = cmdline.index(b"--etcEdenDir") + 1
-        etc_eden_dir = Path(cmdline[etc_eden_dir_idx].decode("utf-8"))
-    except ValueError:
-        etc_eden_dir = None
-    try:
-        config_path_idx = cmdline.index(b"--configPath") + 1
-        config_path = Path(cmdline[config_path_idx].decode("utf-8")).parent
-    except ValueError:
-        config_path = None
-
-    return EdenInstance(eden_dir, etc_eden_dir, config_path)
+    # Collect the values of the few flags we care about in a single pass over
+    # the command line. Only the first occurrence of each flag is used.
+    values: Dict[bytes, Optional[bytes]] = {
+        b"--edenDir": None,
+        b"--etcEdenDir": None,
+        b"--configPath": None,
+    }
+    args = iter(cmdline)
+    for arg in args:
+        if arg in values and values[arg] is None:
+            values[arg] = next(args, None)
+
+    def _path(flag: bytes) -> Optional[Path]:
+        value = values[flag]
+        return Path(value.decode("utf-8")) if value is not None else None
+
+    eden_dir = _path(b"--edenDir")
+    etc_eden_dir = _path(b"--etcEdenDir")
+    config_path = _path(b"--configPath")
+    home_dir = config_path.parent if config_path is not None else None
+
+    return EdenInstance(eden_dir, etc_eden_dir, home_dir)
 
 
 def _check_same_eden_directory(found_path: Path, path_arg: Path) -> None:
@@ -1585,5 +1727,139 @@ def _verify_mount_point(mount_point: str) -> None:
 TomlConfigDict = Mapping[str, Mapping[str, Any]]
 
 
+def _read_small_file(path: Path) -> bytes:
+    """Read the full contents of a small file, bypassing the buffered IO
+    layers that Path.read_bytes() sets up."""
+    fd = os.open(
+        path,
+        os.O_RDONLY | getattr(os, "O_CLOEXEC", 0) | getattr(os, "O_BINARY", 0),
+    )
+    try:
+        # Ask for one byte more than the file size: for a regular file, a
+        # read that returns less than requested means that we have hit EOF,
+        # so the common case is a single read() call.
+        bufsize = os.fstat(fd).st_size + 1
+        chunks = []
+        while True:
+            chunk = os.read(fd, bufsize)
+            chunks.append(chunk)
+            if len(chunk) < bufsize:
+                break
+        return b"".join(chunks)
+    finally:
+        os.close(fd)
+
+
 def load_toml_config(path: Path) -> TomlConfigDict:
-    return typing.cast(TomlConfigDict, toml.load(str(path)))
+    return parse_toml(_read_small_file(path))
+
+
+_TOML_BARE_TABLE_HEADER_RE = re.compile(
+    rb"^\[[ \t]*([A-Za-z0-9_-]+)[ \t]*\][ \t]*(?:#.*)?$"
+)
+_TOML_QUOTED_TABLE_HEADER_RE = re.compile(
+    rb'^\[[ \t]*"([^"\\]*)"[ \t]*\][ \t]*(?:#.*)?$'
+)
+
+
+def _scan_toml_section_names(data: bytes) -> Optional[Set[str]]:
+    """Find the names of the tables in a TOML document by looking only at the
+    table header lines, without parsing the document.
+    Returns None if the document might define tables some other way (eg:
+    dotted keys, array tables, or keys before the first header), in which
+    case the caller must assume that it may contain any section.
+    Lines that merely look like headers (eg: inside multi-line strings) can
+    only add extra names, which is harmless.
+    """
+    sections: Set[str] = set()
+    seen_header = False
+    for line in data.splitlines():
+        line = line.strip()
+        if not line or line.startswith(b"#"):
+            continue
+        if line.startswith(b"["):
+            m = _TOML_BARE_TABLE_HEADER_RE.match(
+                line
+            ) or _TOML_QUOTED_TABLE_HEADER_RE.match(line)
+            if m is None:
+                return None
+            try:
+                sections.add(m.group(1).decode("utf-8"))
+            except UnicodeDecodeError:
+                return None
+            seen_header = True
+        elif not seen_header:
+            return None
+    return sections
+
+
+# Identifies one version of an rc file: (path, mtime, size, inode).
+_TomlFileKey = Tuple[str, int, int, int]
+
+# Parsed rc files keyed by their _TomlFileKey, so that re-reading an
+# unchanged file costs a stat rather than a parse.  The cached dicts are
+# shared and must be treated as read-only.
+_PARSED_TOML_CACHE: Dict[_TomlFileKey, TomlConfigDict] = {}
+# The section names found by _scan_toml_section_names() in rc files that
+# have not been parsed, under the same keys.
+_TOML_SECTIONS_CACHE: Dict[_TomlFileKey, Optional[Set[str]]] = {}
+_PARSED_TOML_CACHE_SIZE = 32
+
+_T = TypeVar("_T")
+
+
+def _toml_file_key(path: Path) -> _TomlFileKey:
+    st = os.stat(path)
+    return (os.fspath(path), st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _cache_put(cache: Dict[_TomlFileKey, _T], key: _TomlFileKey, value: _T) -> None:
+    if len(cache) >= _PARSED_TOML_CACHE_SIZE:
+        # Evict the oldest entry
+        del cache[next(iter(cache))]
+    cache[key] = value
+
+
+def _load_toml_config_cached(path: Path) -> TomlConfigDict:
+    key = _toml_file_key(path)
+    toml_cfg = _PARSED_TOML_CACHE.get(key)
+    if toml_cfg is None:
+        toml_cfg = load_toml_config(path)
+        _cache_put(_PARSED_TOML_CACHE, key, toml_cfg)
+    return toml_cfg
+
+
+def _load_toml_section_cached(
+    path: Path, key: _TomlFileKey, section: str
+) -> Optional[Mapping[str, Any]]:
+    """Return the options of one section of an rc file, or None if the file
+    does not have that section.
+    A file that has not been parsed yet is read once; its table headers are
+    scanned and the same bytes are only parsed if they may contain the
+    section.  The header index is cached next to the parsed files so that
+    files without the section are not read again while they are unchanged.
+    """
+    toml_cfg = _PARSED_TOML_CACHE.get(key)
+    if toml_cfg is None:
+        data = None
+        if key in _TOML_SECTIONS_CACHE:
+            file_sections = _TOML_SECTIONS_CACHE[key]
+        else:
+            data = _read_small_file(path)
+            file_sections = _scan_toml_section_names(data)
+            _cache_put(_TOML_SECTIONS_CACHE, key, file_sections)
+        if file_sections is not None and section not in file_sections:
+            return None
+        if data is None:
+            data = _read_small_file(path)
+        toml_cfg = parse_toml(data)
+        _cache_put(_PARSED_TOML_CACHE, key, toml_cfg)
+    return toml_cfg.get(section)
+
+
+def parse_toml(data: bytes) -> TomlConfigDict:
+    """Parse UTF-8 encoded TOML, raising TomlDecodeError if it is malformed."""
+    text = data.decode("utf-8")
+    if tomllib is not None:
+        return typing.cast(TomlConfigDict, tomllib.loads(text))
+    return typing.cast(TomlConfigDict, toml.loads(text))
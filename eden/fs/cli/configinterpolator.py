@@ -7,7 +7,11 @@
 # pyre-strict
 
 import configparser
-from typing import Dict, Mapping, MutableMapping
+import re
+from typing import Mapping, Match, MutableMapping
+
+
+_TOKEN_RE = re.compile(r"\$\{([^}\x00]*)\}")
 
 
 class EdenConfigInterpolator(configparser.Interpolation):
@@ -21,20 +25,21 @@ class EdenConfigInterpolator(configparser.Interpolation):
     this approach in the C++ implementation of the parser.
     """
 
-    def __init__(self, defaults: Dict[str, str]) -> None:
-        self._defaults: Dict[str, str] = {}
-        """ pre-construct the token name that we're going to substitute.
-            eg: {"foo": "bar"} is stored as {"${foo}": "bar"} internally
-        """
-        for k, v in defaults.items():
-            self._defaults["${" + k + "}"] = v
+    def __init__(self, defaults: Mapping[str, str]) -> None:
+        # Not copied: callers pass in mappings that they don't modify later,
+        # such as EdenInstance's read-only MappingProxyType.
+        self._defaults: Mapping[str, str] = defaults
 
     def _interpolate(self, value: str) -> str:
-        """simple brute force replacement using the defaults that were
-        provided to us during construction"""
-        for k, v in self._defaults.items():
-            value = value.replace(k, v)
-        return value
+        """replace each ${name} token in a single pass using the defaults
+        that were provided to us during construction.  Tokens that don't
+        name one of the defaults are left as-is."""
+        if "$" not in value:
+            return value
+        return _TOKEN_RE.sub(self._replace_token, value)
+
+    def _replace_token(self, match: Match[str]) -> str:
+        return self._defaults.get(match.group(1), match.group(0))
 
     def before_get(
         self,
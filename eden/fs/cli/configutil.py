@@ -6,6 +6,7 @@
 
 import collections
 import configparser
+import sys
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -48,6 +49,10 @@ _UnsupportedValue = Any
 
 _TConfigValue = TypeVar("_TConfigValue", bound=ConfigValue)
 
+# Used to join string arrays for interpolation; it cannot appear in a
+# ${...} token so interpolation never spans two items.
+_STRS_SEPARATOR = "\x00"
+
 
 class EdenConfigParser:
     _interpolator: configparser.Interpolation
@@ -66,10 +71,28 @@ class EdenConfigParser:
         self, dictionary: Mapping[ConfigSectionName, Mapping[ConfigOptionName, Any]]
     ) -> None:
         for section, options in dictionary.items():
+            # A section without options is not recorded, so it does not show
+            # up in sections(), has_section() or to_raw_dict().  This is what
+            # the option loop below did before it looked the section up once
+            # per section, so keep it that way explicitly.
+            if not options:
+                continue
+            # Section and option names are interned so that the lookups in
+            # _get(), which also interns its arguments, can match keys by
+            # identity.
+            section = sys.intern(section)
+            stored_options = self._sections[section]
             for option, value in options.items():
-                self._sections[section][option] = self._make_storable_value(
-                    section, option, value
-                )
+                option = sys.intern(option)
+                # Scalars are by far the most common values and are stored
+                # as-is, so skip the general conversion for them.
+                value_type = type(value)
+                if value_type is str or value_type is bool:
+                    stored_options[option] = value
+                else:
+                    stored_options[option] = self._make_storable_value(
+                        section, option, value
+                    )
 
     # Convert the passed EdenConfigParser to a raw dictionary (without
     # interpolation)
@@ -139,9 +162,10 @@ class EdenConfigParser:
         default: _TConfigValue,
         expected_type: Type[_TConfigValue],
     ) -> _TConfigValue:
-        options = self._sections.get(section)
+        options = self._sections.get(sys.intern(section))
         if options is None:
             return default
+        option = sys.intern(option)
         if option not in options:
             return default
         value = options[option]
@@ -156,9 +180,12 @@ class EdenConfigParser:
         value: Union[ConfigValue, _UnsupportedValue],
         expected_type: Type[_TConfigValue],
     ) -> _TConfigValue:
+        # Values almost always have exactly the expected type, so check for
+        # that first and only fall back to the slower isinstance() check for
+        # subclasses.
         # TODO(T39124448): Remove Pyre workaround; use isinstance directly.
         is_instance = isinstance
-        if not is_instance(value, expected_type):
+        if type(value) is not expected_type and not is_instance(value, expected_type):
             expected_type_temp: Type[ConfigValue] = expected_type
             raise UnexpectedType(
                 section=section,
@@ -206,8 +233,8 @@ class EdenConfigParser:
         self, section: ConfigSectionName, option: ConfigOptionName, value: _TConfigValue
     ) -> _TConfigValue:
         if isinstance(value, Strs):
-            return Strs(  # type: ignore  # T39125053
-                self._interpolate_value(section, option, item) for item in value
+            return self._interpolate_strs(  # type: ignore  # T39125053
+                section, option, value
             )
         elif isinstance(value, str):
             return self._interpolator.before_get(  # type: ignore  # T39125053
@@ -216,6 +243,26 @@ class EdenConfigParser:
         else:
             return value
 
+    def _interpolate_strs(
+        self, section: ConfigSectionName, option: ConfigOptionName, value: Strs
+    ) -> Strs:
+        if not any("$" in item for item in value):
+            return value
+        if len(value) > 1 and not any(_STRS_SEPARATOR in item for item in value):
+            # Interpolate all of the items in one call by joining them
+            # together, rather than once per item.
+            joined = self._interpolator.before_get(
+                self._parser,
+                section,
+                option,
+                _STRS_SEPARATOR.join(value),
+                self._defaults,
+            )
+            items = joined.split(_STRS_SEPARATOR)
+            if len(items) == len(value):
+                return Strs(items)
+        return Strs(self._interpolate_value(section, option, item) for item in value)
+
     def _make_storable_value(
         self, section: ConfigSectionName, option: ConfigOptionName, value: Any
     ) -> Union[ConfigValue, _UnsupportedValue]:
@@ -274,16 +321,19 @@ class UnexpectedType(Exception):
         return _toml_value(self.value)
 
 
+_TOML_TYPE_NAMES: Dict[Type, str] = {
+    Strs: "array of strings",
+    bool: "boolean",
+    list: "array",
+    str: "string",
+}
+
+
 def _toml_type_name(type: Type) -> str:
-    if type is Strs:
-        return "array of strings"
-    if type is bool:
-        return "boolean"
-    if type is list:
-        return "array"
-    if type is str:
-        return "string"
-    return type.__name__
+    name = _TOML_TYPE_NAMES.get(type)
+    if name is None:
+        return type.__name__
+    return name
 
 
 def _toml_value(value: Union[bool, str]) -> str:
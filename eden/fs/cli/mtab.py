@@ -12,7 +12,7 @@ import random
 import re
 import subprocess
 import sys
-from typing import List, NamedTuple, Union
+from typing import Iterator, List, NamedTuple, Optional, Union
 
 
 log = logging.getLogger("eden.fs.cli.mtab")
@@ -31,6 +31,11 @@ class MountTable(abc.ABC):
     def read(self) -> List[MountInfo]:
         "Returns the list of system mounts."
 
+    def iter_mounts(self) -> Iterator[MountInfo]:
+        """Yields the system mounts one at a time.
+        Callers that stop early may avoid parsing the rest of the table."""
+        return iter(self.read())
+
     @abc.abstractmethod
     def unmount_lazy(self, mount_point: bytes) -> bool:
         "Corresponds to `umount -l` on Linux."
@@ -66,18 +71,22 @@ class MountTable(abc.ABC):
         "Creates a bind mount from source_path to dest_path."
 
 
+def parse_mtab_line(line: bytes) -> Optional[MountInfo]:
+    # columns split by space or tab per man page
+    entries = line.split()
+    if len(entries) != 6:
+        log.warning(f"mount table line has {len(entries)} entries instead of 6")
+        return None
+    device, mount_point, vfstype, opts, freq, passno = entries
+    return MountInfo(device=device, mount_point=mount_point, vfstype=vfstype)
+
+
 def parse_mtab(contents: bytes) -> List[MountInfo]:
     mounts = []
     for line in contents.splitlines():
-        # columns split by space or tab per man page
-        entries = line.split()
-        if len(entries) != 6:
-            log.warning(f"mount table line has {len(entries)} entries instead of 6")
-            continue
-        device, mount_point, vfstype, opts, freq, passno = entries
-        mounts.append(
-            MountInfo(device=device, mount_point=mount_point, vfstype=vfstype)
-        )
+        mount_info = parse_mtab_line(line)
+        if mount_info is not None:
+            mounts.append(mount_info)
     return mounts
 
 
@@ -90,6 +99,13 @@ class LinuxMountTable(MountTable):
         with open("/proc/self/mounts", "rb") as f:
             return parse_mtab(f.read())
 
+    def iter_mounts(self) -> Iterator[MountInfo]:
+        with open("/proc/self/mounts", "rb") as f:
+            for line in f:
+                mount_info = parse_mtab_line(line)
+                if mount_info is not None:
+                    yield mount_info
+
     def unmount_lazy(self, mount_point: bytes) -> bool:
         # MNT_DETACH
         return 0 == subprocess.call(["sudo", "umount", "-l", mount_point])
@@ -16,7 +16,7 @@ import stat
 import subprocess
 import sys
 from pathlib import Path
-from typing import Dict, Iterable, Optional
+from typing import Dict, Iterable, Optional, Union
 
 from thrift.Thrift import TApplicationException
 
@@ -74,7 +74,7 @@ def make_scratch_dir(checkout: EdenCheckout, subdir: Path) -> Path:
             [
                 os.fsdecode(mkscratch),
                 "path",
-                os.fsdecode(checkout.path),
+                checkout.path_str,
                 "--subdir",
                 os.fsdecode(sub),
             ]
@@ -145,11 +145,16 @@ class RedirectionType(enum.Enum):
 
     @classmethod
     def from_arg_str(cls, arg: str) -> "RedirectionType":
-        name_to_value = {"bind": cls.BIND, "symlink": cls.SYMLINK}
-        value = name_to_value.get(arg)
-        if value:
-            return value
-        raise ValueError(f"{arg} is not a valid RedirectionType")
+        try:
+            return _ARG_TO_REDIRECTION_TYPE[arg]
+        except KeyError:
+            raise ValueError(f"{arg} is not a valid RedirectionType")
+
+
+_ARG_TO_REDIRECTION_TYPE: Dict[str, RedirectionType] = {
+    "bind": RedirectionType.BIND,
+    "symlink": RedirectionType.SYMLINK,
+}
 
 
 def opt_paths_are_equal(a: Optional[Path], b: Optional[Path]) -> bool:
@@ -493,6 +498,76 @@ def get_configured_redirections(checkout: EdenCheckout) -> Dict[str, Redirection
     return redirs
 
 
+def _is_redirection_mount(mount_point: bytes) -> bool:
+    # The is_bind_mount test may appear to be redundant but it is
+    # possible for mounts to layer such that we have:
+    #
+    # /my/repo    <-- fuse at the top of the vfs
+    # /my/repo/buck-out
+    # /my/repo    <-- earlier generation fuse at bottom
+    #
+    # The buck-out bind mount in the middle is visible in the
+    # mount table but is not visible via the VFS because there
+    # is a different /my/repo mounted over the top.
+    #
+    # We test whether we can see a mount point at that location
+    # before recording it in the effective redirection list so
+    # that we don't falsely believe that the bind mount is up.
+    return is_bind_mount(Path(os.fsdecode(mount_point)))
+
+
+def _make_unknown_mount_redirection(rel_path: str) -> Redirection:
+    return Redirection(
+        repo_path=Path(rel_path),
+        redir_type=RedirectionType.UNKNOWN,
+        target=None,
+        source="mount",
+        state=RedirectionState.UNKNOWN_MOUNT,
+    )
+
+
+def _update_configured_redirection_state(
+    checkout: EdenCheckout, redir: Redirection, is_in_mount_table: bool
+) -> None:
+    """Set the state of a configured redirection based on whether it
+    was found in the mount table and on the state of its symlink."""
+    if is_in_mount_table:
+        if redir.type != RedirectionType.BIND:
+            redir.state = RedirectionState.UNKNOWN_MOUNT
+        # else: we expected them to be in the mount table and they were.
+        # we don't know enough to tell whether the mount points where
+        # we want it to point, so we just assume that it is in the right
+        # state.
+    else:
+        if redir.type == RedirectionType.BIND and sys.platform != "win32":
+            # We expected both of these types to be visible in the
+            # mount table, but they were not, so we consider them to
+            # be in the NOT_MOUNTED state.
+            redir.state = RedirectionState.NOT_MOUNTED
+        elif redir.type == RedirectionType.SYMLINK or sys.platform == "win32":
+            try:
+                # Resolve to normalize extended-length path on Windows
+                expected_target = redir.expand_target_abspath(checkout)
+                if expected_target:
+                    expected_target = expected_target.resolve()
+                symlink_path = os.fsdecode(redir.expand_repo_path(checkout))
+                try:
+                    # TODO: replace this with Path.readlink once Python 3.9+
+                    target = Path(os.readlink(symlink_path)).resolve()
+                except ValueError as exc:
+                    # Windows throws ValueError when the target is not a symlink
+                    raise OSError(errno.EINVAL) from exc
+                if target != expected_target:
+                    redir.state = RedirectionState.SYMLINK_INCORRECT
+            except OSError:
+                # We're considering a variety of errors that might
+                # manifest around trying to read the symlink as meaning
+                # that the symlink is effectively missing, even if it
+                # isn't literally missing.  eg: EPERM means we can't
+                # resolve it, so it is effectively no good.
+                redir.state = RedirectionState.SYMLINK_MISSING
+
+
 def get_effective_redirections(
     checkout: EdenCheckout, mount_table: mtab.MountTable
 ) -> Dict[str, Redirection]:
@@ -500,77 +575,49 @@ def get_effective_redirections(
     This is based on the explicitly configured settings but also factors in
     effective configuration by reading the mount table.
     """
+    configured = get_configured_redirections(checkout)
+
     redirs = {}
     checkout_path_bytes = bytes(checkout.path) + b"/"
     for mount_info in mount_table.read():
         mount_point = mount_info.mount_point
         if mount_point.startswith(checkout_path_bytes):
             rel_path = os.fsdecode(mount_point[len(checkout_path_bytes) :])
-            # The is_bind_mount test may appear to be redundant but it is
-            # possible for mounts to layer such that we have:
-            #
-            # /my/repo    <-- fuse at the top of the vfs
-            # /my/repo/buck-out
-            # /my/repo    <-- earlier generation fuse at bottom
-            #
-            # The buck-out bind mount in the middle is visible in the
-            # mount table but is not visible via the VFS because there
-            # is a different /my/repo mounted over the top.
-            #
-            # We test whether we can see a mount point at that location
-            # before recording it in the effective redirection list so
-            # that we don't falsely believe that the bind mount is up.
-            if rel_path and is_bind_mount(Path(os.fsdecode(mount_point))):
-                redirs[rel_path] = Redirection(
-                    repo_path=Path(rel_path),
-                    redir_type=RedirectionType.UNKNOWN,
-                    target=None,
-                    source="mount",
-                    state=RedirectionState.UNKNOWN_MOUNT,
-                )
+            if rel_path and _is_redirection_mount(mount_point):
+                redirs[rel_path] = _make_unknown_mount_redirection(rel_path)
 
-    for rel_path, redir in get_configured_redirections(checkout).items():
-        is_in_mount_table = rel_path in redirs
-        if is_in_mount_table:
-            if redir.type != RedirectionType.BIND:
-                redir.state = RedirectionState.UNKNOWN_MOUNT
-            # else: we expected them to be in the mount table and they were.
-            # we don't know enough to tell whether the mount points where
-            # we want it to point, so we just assume that it is in the right
-            # state.
-        else:
-            if redir.type == RedirectionType.BIND and sys.platform != "win32":
-                # We expected both of these types to be visible in the
-                # mount table, but they were not, so we consider them to
-                # be in the NOT_MOUNTED state.
-                redir.state = RedirectionState.NOT_MOUNTED
-            elif redir.type == RedirectionType.SYMLINK or sys.platform == "win32":
-                try:
-                    # Resolve to normalize extended-length path on Windows
-                    expected_target = redir.expand_target_abspath(checkout)
-                    if expected_target:
-                        expected_target = expected_target.resolve()
-                    symlink_path = os.fsdecode(redir.expand_repo_path(checkout))
-                    try:
-                        # TODO: replace this with Path.readlink once Python 3.9+
-                        target = Path(os.readlink(symlink_path)).resolve()
-                    except ValueError as exc:
-                        # Windows throws ValueError when the target is not a symlink
-                        raise OSError(errno.EINVAL) from exc
-                    if target != expected_target:
-                        redir.state = RedirectionState.SYMLINK_INCORRECT
-                except OSError:
-                    # We're considering a variety of errors that might
-                    # manifest around trying to read the symlink as meaning
-                    # that the symlink is effectively missing, even if it
-                    # isn't literally missing.  eg: EPERM means we can't
-                    # resolve it, so it is effectively no good.
-                    redir.state = RedirectionState.SYMLINK_MISSING
+    for rel_path, redir in configured.items():
+        _update_configured_redirection_state(checkout, redir, rel_path in redirs)
         redirs[rel_path] = redir
 
     return redirs
 
 
+def get_effective_redirection_for(
+    checkout: EdenCheckout, mount_table: mtab.MountTable, repo_path: str
+) -> Optional[Redirection]:
+    """Computes the effective redirection for a single repo_path, as
+    `get_effective_redirections(checkout, mount_table).get(repo_path)` would.
+    The mount table is scanned only until the matching mount point is found.
+    """
+    mount_point = bytes(checkout.path) + b"/" + os.fsencode(repo_path)
+    is_in_mount_table = False
+    if repo_path:
+        for mount_info in mount_table.iter_mounts():
+            if mount_info.mount_point == mount_point:
+                is_in_mount_table = _is_redirection_mount(mount_point)
+                break
+
+    redir = get_configured_redirections(checkout).get(repo_path)
+    if redir is None:
+        if is_in_mount_table:
+            return _make_unknown_mount_redirection(repo_path)
+        return None
+
+    _update_configured_redirection_state(checkout, redir, is_in_mount_table)
+    return redir
+
+
 def file_size(path: Path) -> int:
     st = path.lstat()
     return st.st_size
@@ -819,13 +866,20 @@ class FixupCmd(Subcmd):
         return 0 if ok else 1
 
 
-def resolve_repo_relative_path(checkout_path: Path, repo_rel_path: Path) -> Path:
+def resolve_repo_relative_path(
+    checkout_path: Path, repo_rel_path: Union[Path, str]
+) -> Path:
     """Given a path, verify that it is an appropriate repo-root-relative path
     and return the resolved form of that path.
     The ideal is that they pass in `foo` and we return `foo`, but we also
     allow for the path to be absolute path to `foo`, in which case we resolve
     it and verify that it falls with the repo and then return the relative
-    path to `foo`."""
+    path to `foo`.
+    `repo_rel_path` may be passed as a str, in which case it is converted
+    to a Path exactly once here rather than by each caller."""
+
+    if not isinstance(repo_rel_path, Path):
+        repo_rel_path = Path(repo_rel_path)
 
     if repo_rel_path.is_absolute():
         # Well, the original intent was to only interpret paths as relative
@@ -909,22 +963,23 @@ class AddCmd(Subcmd):
 
         instance, checkout, _rel_path = cmd_util.require_checkout(args, args.mount)
 
-        # We need to query the status of the mounts to catch things like
+        try:
+            repo_path = resolve_repo_relative_path(checkout.path, args.repo_path)
+        except RuntimeError as exc:
+            print(str(exc), file=sys.stderr)
+            return 1
+        args.repo_path = str(repo_path)
+
+        # We need to query the status of the mount to catch things like
         # a redirect being configured but unmounted.  This improves the
         # UX in the case where eg: buck is adding a redirect.  Without this
         # we'd hit the skip case below because it is configured, but we wouldn't
         # bring the redirection back online.
         # However, we keep this separate from the `redirs` list below for
         # the reasons stated in the comment below.
-        effective_redirs = get_effective_redirections(checkout, mtab.new())
-
-        try:
-            args.repo_path = str(
-                resolve_repo_relative_path(checkout.path, Path(args.repo_path))
-            )
-        except RuntimeError as exc:
-            print(str(exc), file=sys.stderr)
-            return 1
+        existing_redir = get_effective_redirection_for(
+            checkout, mtab.new(), args.repo_path
+        )
 
         # Get only the explicitly configured entries for the purposes of the
         # add command, so that we avoid writing out any of the effective list
@@ -933,10 +988,8 @@ class AddCmd(Subcmd):
         # don't want to scoop those up and write them out to this branch of
         # the configuration.
         redirs = get_configured_redirections(checkout)
-        redir = Redirection(
-            Path(args.repo_path), redir_type, None, USER_REDIRECTION_SOURCE
-        )
-        existing_redir = effective_redirs.get(args.repo_path, None)
+        # Reuse the already resolved Path rather than re-parsing args.repo_path
+        redir = Redirection(repo_path, redir_type, None, USER_REDIRECTION_SOURCE)
         if (
             existing_redir
             and existing_redir == redir
@@ -994,8 +1047,7 @@ class DelCmd(Subcmd):
             checkout.save_config(config)
             return 0
 
-        redirs = get_effective_redirections(checkout, mtab.new())
-        redir = redirs.get(args.repo_path)
+        redir = get_effective_redirection_for(checkout, mtab.new(), args.repo_path)
         if redir:
             # This path isn't possible to trigger until we add profiles,
             # but let's be ready for it anyway.
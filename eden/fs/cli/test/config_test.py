@@ -12,9 +12,9 @@ import os
 import sys
 import unittest
 from pathlib import Path
+from types import MappingProxyType
+from unittest.mock import patch
 
-import toml
-import toml.decoder
 from eden.test_support.temporary_directory import TemporaryDirectoryMixin
 from eden.test_support.testcase import EdenTestCaseBase
 
@@ -24,6 +24,11 @@ from ..configinterpolator import EdenConfigInterpolator
 from ..configutil import EdenConfigParser, UnexpectedType
 
 
+_LINUX_ONLY = unittest.skipUnless(
+    sys.platform.startswith("linux"), "experimental systemd mode is Linux-only"
+)
+
+
 def get_toml_test_file_invalid() -> str:
     cfg_file = """
 [core thisIsNotAllowed]
@@ -72,17 +77,16 @@ class TomlConfigTest(EdenTestCaseBase):
         self._user = "bob"
         self._state_dir = self.tmp_dir / ".eden"
         self._etc_eden_dir = self.tmp_dir / "etc/eden"
-        self._config_d = self.tmp_dir / "etc/eden/config.d"
+        self._config_d = self._etc_eden_dir / "config.d"
         self._home_dir = self.tmp_dir / "home" / self._user
-        self._interpolate_dict = {
-            "USER": self._user,
-            "USER_ID": "42",
-            "HOME": str(self._home_dir),
-        }
+        self._home_str = str(self._home_dir)
+        self._user_config_path = self._home_dir / ".edenrc"
+        self._interpolate_dict = MappingProxyType(
+            {"USER": self._user, "USER_ID": "42", "HOME": self._home_str}
+        )
 
-        self._state_dir.mkdir()
-        self._config_d.mkdir(exist_ok=True, parents=True)
-        self._home_dir.mkdir(exist_ok=True, parents=True)
+        for d in (self._state_dir, self._config_d, self._home_dir):
+            os.makedirs(d, exist_ok=True)
 
         self.unsetenv("EDEN_EXPERIMENTAL_SYSTEMD")
 
@@ -90,34 +94,34 @@ class TomlConfigTest(EdenTestCaseBase):
         path = self._config_d / "defaults.toml"
         path.write_text(get_toml_test_file_defaults())
 
-        path = self._home_dir / ".edenrc"
-        path.write_text(get_toml_test_file_user_rc())
+        self._user_config_path.write_text(get_toml_test_file_user_rc())
 
         path = self._etc_eden_dir / "edenfs.rc"
         path.write_text(get_toml_test_file_system_rc())
 
     def assert_core_config(self, cfg: EdenInstance) -> None:
         self.assertEqual(
-            cfg.get_config_value("rage.reporter", default=""),
-            'pastry --title "eden rage from $(hostname)"',
-        )
-        self.assertEqual(
-            cfg.get_config_value("core.ignoreFile", default=""),
-            f"/home/{self._user}/.gitignore-override",
-        )
-        self.assertEqual(
-            cfg.get_config_value("core.systemIgnoreFile", default=""),
-            "/etc/eden/gitignore",
-        )
-        self.assertEqual(
-            cfg.get_config_value("core.edenDirectory", default=""),
-            f"/home/{self._user}/.eden",
+            cfg.get_config_values(
+                [
+                    "rage.reporter",
+                    "core.ignoreFile",
+                    "core.systemIgnoreFile",
+                    "core.edenDirectory",
+                ],
+                defaults={},
+            ),
+            {
+                "rage.reporter": 'pastry --title "eden rage from $(hostname)"',
+                "core.ignoreFile": f"/home/{self._user}/.gitignore-override",
+                "core.systemIgnoreFile": "/etc/eden/gitignore",
+                "core.edenDirectory": f"/home/{self._user}/.eden",
+            },
         )
 
     def assert_config_precedence(self, cfg: EdenInstance) -> None:
         self.assertEqual(
-            cfg.get_config_value("telemetry.scribe-cat", default=""),
-            "/usr/local/bin/scribe_cat",
+            cfg.get_config_values(["telemetry.scribe-cat"], defaults={}),
+            {"telemetry.scribe-cat": "/usr/local/bin/scribe_cat"},
         )
 
     def test_load_config(self) -> None:
@@ -132,14 +136,14 @@ class TomlConfigTest(EdenTestCaseBase):
         exp_rc_files = [
             self._config_d / "defaults.toml",
             self._etc_eden_dir / "edenfs.rc",
-            self._home_dir / ".edenrc",
+            self._user_config_path,
         ]
         self.assertEqual(cfg.get_rc_files(), exp_rc_files)
 
     def test_no_dot_edenrc(self) -> None:
         self.copy_config_files()
 
-        (self._home_dir / ".edenrc").unlink()
+        self._user_config_path.unlink()
         cfg = self.get_config()
         cfg._loadConfig()
 
@@ -162,7 +166,7 @@ class TomlConfigTest(EdenTestCaseBase):
         self.write_user_config(get_toml_test_file_invalid())
 
         cfg = self.get_config()
-        with self.assertRaises(toml.decoder.TomlDecodeError):
+        with self.assertRaises(config_mod.TomlDecodeError):
             cfg._loadConfig()
 
     def test_get_config_value_returns_default_if_section_is_missing(self) -> None:
@@ -199,20 +203,74 @@ test_option = "test value"
             "test value",
         )
 
+    def test_unchanged_config_file_is_parsed_once(self) -> None:
+        self.write_user_config(
+            """[test_section]
+test_option = "test value"
+"""
+        )
+        cfg = self.get_config()
+        with patch.object(
+            config_mod, "_read_small_file", wraps=config_mod._read_small_file
+        ) as mock_read, patch.object(
+            config_mod, "parse_toml", wraps=config_mod.parse_toml
+        ) as mock_parse:
+            for _ in range(2):
+                self.assertEqual(
+                    cfg.get_config_value("test_section.test_option", default=""),
+                    "test value",
+                )
+        mock_read.assert_called_once_with(self._user_config_path)
+        self.assertEqual(mock_parse.call_count, 1)
+
+    def test_config_value_reflects_user_config_changes(self) -> None:
+        self.write_user_config(
+            """[test_section]
+test_option = "old value"
+"""
+        )
+        cfg = self.get_config()
+        self.assertEqual(
+            cfg.get_config_value("test_section.test_option", default=""),
+            "old value",
+        )
+        self.write_user_config(
+            """[test_section]
+test_option = "a new value"
+"""
+        )
+        self.assertEqual(
+            cfg.get_config_value("test_section.test_option", default=""),
+            "a new value",
+        )
+
+    def test_querying_section_only_parses_files_containing_it(self) -> None:
+        self.copy_config_files()
+        cfg = self.get_config()
+        with patch.object(
+            config_mod, "_read_small_file", wraps=config_mod._read_small_file
+        ) as mock_read, patch.object(
+            config_mod, "parse_toml", wraps=config_mod.parse_toml
+        ) as mock_parse:
+            self.assertEqual(
+                cfg.get_config_value("rage.reporter", default=""),
+                'pastry --title "eden rage from $(hostname)"',
+            )
+        read_paths = [c[0][0] for c in mock_read.call_args_list]
+        self.assertIn(self._config_d / "defaults.toml", read_paths)
+        self.assertEqual(len(read_paths), len(set(read_paths)))
+        self.assertEqual(mock_parse.call_count, 1)
+
     def test_experimental_systemd_is_disabled_by_default(self) -> None:
         self.assertFalse(self.get_config().should_use_experimental_systemd_mode())
 
+    @_LINUX_ONLY
     def test_experimental_systemd_is_enabled_with_environment_variable(self) -> None:
-        if not sys.platform.startswith("linux"):
-            return
-
         self.setenv("EDEN_EXPERIMENTAL_SYSTEMD", "1")
         self.assertTrue(self.get_config().should_use_experimental_systemd_mode())
 
+    @_LINUX_ONLY
     def test_experimental_systemd_is_enabled_with_user_config_setting(self) -> None:
-        if not sys.platform.startswith("linux"):
-            return
-
         self.write_user_config(
             """[service]
 experimental_systemd = true
@@ -220,10 +278,8 @@ experimental_systemd = true
         )
         self.assertTrue(self.get_config().should_use_experimental_systemd_mode())
 
+    @_LINUX_ONLY
     def test_experimental_systemd_environment_variable_overrides_config(self) -> None:
-        if not sys.platform.startswith("linux"):
-            return
-
         self.setenv("EDEN_EXPERIMENTAL_SYSTEMD", "1")
         self.write_user_config(
             f"""[service]
@@ -240,12 +296,10 @@ experimental_systemd = true
         )
         self.assertFalse(self.get_config().should_use_experimental_systemd_mode())
 
+    @_LINUX_ONLY
     def test_empty_experimental_systemd_environment_variable_does_not_override_config(
         self,
     ) -> None:
-        if not sys.platform.startswith("linux"):
-            return
-
         self.setenv("EDEN_EXPERIMENTAL_SYSTEMD", "")
         self.write_user_config(
             f"""[service]
@@ -303,8 +357,7 @@ default-revision = "master"
 
         printed_config = io.BytesIO()
         self.get_config().print_full_config(printed_config)
-        parsed_config = printed_config.getvalue().decode("utf-8")
-        parsed_toml = toml.loads(parsed_config)
+        parsed_toml = config_mod.parse_toml(printed_config.getvalue())
 
         self.assertIn("clone", parsed_toml)
         self.assertEqual(parsed_toml["clone"].get("default-revision"), "master")
@@ -348,7 +401,7 @@ experimental_systemd = true
         )
 
     def write_user_config(self, content: str) -> None:
-        (self._home_dir / ".edenrc").write_text(content)
+        self._user_config_path.write_text(content)
 
 
 class EdenConfigParserTest(unittest.TestCase):
@@ -464,6 +517,13 @@ class EdenConfigParserTest(unittest.TestCase):
         section: str = expectation.exception.section
         self.assertEqual(section, "not_test_section")
 
+    def test_sections_without_options_are_not_recorded(self) -> None:
+        parser = EdenConfigParser()
+        parser.read_dict({"empty_section": {}, "test_section": {"a": "a value"}})
+        self.assertEqual(parser.sections(), ["test_section"])
+        self.assertFalse(parser.has_section("empty_section"))
+        self.assertEqual(list(parser.to_raw_dict()), ["test_section"])
+
     def test_querying_strs_with_empty_array_returns_empty_sequence(self) -> None:
         parser = EdenConfigParser()
         parser.read_dict({"test_section": {"test_option": []}})
@@ -9,7 +9,12 @@
 import unittest
 from typing import Optional
 
-from eden.fs.cli.mtab import MountInfo, parse_macos_mount_output, parse_mtab
+from eden.fs.cli.mtab import (
+    MountInfo,
+    parse_macos_mount_output,
+    parse_mtab,
+    parse_mtab_line,
+)
 
 
 class MTabTest(unittest.TestCase):
@@ -30,6 +35,20 @@ edenfs: /tmp/eden_test.4rec6drf/mounts/main fuse rw,nosuid,relatime,user_id=1386
         self.assertEqual(b"/tmp/eden_test.4rec6drf/mounts/main", three.mount_point)
         self.assertEqual(b"fuse", three.vfstype)
 
+    def test_parse_mtab_line(self) -> None:
+        self.assertEqual(
+            MountInfo(
+                device=b"edenfs:",
+                mount_point=b"/tmp/eden_test.4rec6drf/mounts/main",
+                vfstype=b"fuse",
+            ),
+            parse_mtab_line(
+                b"edenfs: /tmp/eden_test.4rec6drf/mounts/main fuse "
+                b"rw,nosuid,relatime,user_id=138655,group_id=100 0 0\n"
+            ),
+        )
+        self.assertIsNone(parse_mtab_line(b"bogus line here\n"))
+
     def test_parse_mtab_macos(self) -> None:
         contents = b"""\
 /dev/disk1s1 on / (apfs, local, journaled)
@@ -18,11 +18,13 @@ SOCKET_PATH = "socket"
 
 class EdenNotRunningError(Exception):
     def __init__(self, socket_path: str):
-        super(EdenNotRunningError, self).__init__(
-            f"edenfs daemon does not appear to be running: tried {socket_path}"
-        )
+        self._msg = f"edenfs daemon does not appear to be running: tried {socket_path}"
+        super(EdenNotRunningError, self).__init__(self._msg)
         self.socket_path = socket_path
 
+    def __str__(self) -> str:
+        return self._msg
+
 
 class EdenClient(StreamingEdenService):
     """
@@ -33,6 +35,15 @@ class EdenClient(StreamingEdenService):
     socket_path: Optional[str] = None
 
     async def __aenter__(self):
+        socket_path = self.socket_path
+        if socket_path is not None:
+            # If there is no socket at all then edenfs is clearly not running;
+            # detect that with a stat rather than setting up a transport only
+            # to have the connect fail.
+            try:
+                os.stat(socket_path)
+            except (FileNotFoundError, NotADirectoryError):
+                raise EdenNotRunningError(socket_path)
         try:
             return await super().__aenter__()
         except TransportError as ex:
@@ -9,8 +9,11 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 import ctypes
-import socket
+import os
 import sys
+import threading
+from socket import timeout as socket_timeout
+from typing import Any, Tuple, Union
 
 from thrift.transport.TSocket import TSocket
 from thrift.transport.TTransport import TTransportException
@@ -29,10 +32,17 @@ WSAETIMEDOUT = 10060
 WSAECONNREFUSED = 10061
 
 # Socket options
+SO_SNDBUF = 0x1001
+SO_RCVBUF = 0x1002
 SO_SNDTIMEO = 0x1005
 SO_RCVTIMEO = 0x1006
 SOL_SOCKET = 0xFFFF
 
+# Size requested for the socket send and receive buffers. Can be overridden
+# with the EDEN_THRIFT_SOCKET_BUFFER_SIZE environment variable; 0 leaves the
+# Winsock defaults alone.
+DEFAULT_SOCKET_BUFFER_SIZE = 1 << 20
+
 # int WSAStartup(
 #     WORD      wVersionRequired,
 #     LPWSADATA lpWSAData
@@ -57,6 +67,28 @@ WSAStartup = ctypes.windll.ws2_32.WSAStartup
 WSAStartup.argtypes = [ctypes.wintypes.WORD, ctypes.POINTER(WSAData64)]
 WSAStartup.restype = ctypes.c_int
 
+# Winsock only needs to be initialized once per process. The WSAData64 filled
+# in by WSAStartup is kept alive for the lifetime of the module.
+_wsa_lock = threading.Lock()
+_wsa_data = None
+
+
+def _ensure_wsa_started():
+    # type: () -> None
+    global _wsa_data
+    if _wsa_data is not None:
+        return
+    with _wsa_lock:
+        if _wsa_data is not None:
+            return
+        wsa_data = WSAData64()
+        # ctypes.c_ushort(514) = MAKE_WORD(2,2) which is for the winsock
+        # library version 2.2
+        errcode = WSAStartup(ctypes.c_ushort(514), ctypes.pointer(wsa_data))
+        if errcode != 0:
+            raise WindowsSocketException(errcode)
+        _wsa_data = wsa_data
+
 
 # Win32 socket API
 # SOCKET WSAAPI socket(
@@ -89,6 +121,32 @@ send = ctypes.windll.ws2_32.send
 send.argtypes = [ctypes.wintypes.HANDLE, ctypes.c_char_p, ctypes.c_int, ctypes.c_int]
 send.restype = ctypes.c_int
 
+
+class WSABUF(ctypes.Structure):
+    _fields_ = [("len", ctypes.c_ulong), ("buf", ctypes.c_void_p)]
+
+
+# int WSAAPI WSASend(
+#   SOCKET                             s,
+#   LPWSABUF                           lpBuffers,
+#   DWORD                              dwBufferCount,
+#   LPDWORD                            lpNumberOfBytesSent,
+#   DWORD                              dwFlags,
+#   LPWSAOVERLAPPED                    lpOverlapped,
+#   LPWSAOVERLAPPED_COMPLETION_ROUTINE lpCompletionRoutine
+# );
+WSASend = ctypes.windll.ws2_32.WSASend
+WSASend.argtypes = [
+    ctypes.wintypes.HANDLE,
+    ctypes.POINTER(WSABUF),
+    ctypes.wintypes.DWORD,
+    ctypes.POINTER(ctypes.wintypes.DWORD),
+    ctypes.wintypes.DWORD,
+    ctypes.c_void_p,
+    ctypes.c_void_p,
+]
+WSASend.restype = ctypes.c_int
+
 # int recv(
 #   SOCKET s,
 #   char   *buf,
@@ -137,6 +195,25 @@ class WindowsSocketException(Exception):
         )
 
 
+def _check_return_code(retcode):
+    # type: (int) -> None
+    if retcode == -1:
+        errcode = WSAGetLastError()
+        if errcode == WSAECONNREFUSED:
+            # This error will be returned when Edenfs is not running
+            raise TTransportException(
+                type=TTransportException.NOT_OPEN, message="eden not running"
+            )
+        elif errcode == WSAETIMEDOUT:
+            raise socket_timeout()
+        else:
+            raise WindowsSocketException(errcode)
+
+
+# The methods below that sit on the send/receive path take the ctypes
+# functions they call as default arguments. This turns the per-call global
+# lookups into local ones, and pins the Winsock functions regardless of later
+# rebinding of module names (this module's `socket` shadows the stdlib one).
 class WindowsSocketHandle(object):
     AF_UNIX = 1
     SOCK_STREAM = 1
@@ -144,87 +221,137 @@ class WindowsSocketHandle(object):
     fd = -1  # type: int
     address = ""  # type: str
 
-    @staticmethod
-    def _checkReturnCode(retcode):
-        if retcode == -1:
-            errcode = WSAGetLastError()
-            if errcode == WSAECONNREFUSED:
-                # This error will be returned when Edenfs is not running
-                raise TTransportException(
-                    type=TTransportException.NOT_OPEN, message="eden not running"
-                )
-            elif errcode == WSAETIMEDOUT:
-                raise socket.timeout()
-            else:
-                raise WindowsSocketException(errcode)
+    _checkReturnCode = staticmethod(_check_return_code)
 
     def __init__(self):
-        wsa_data = WSAData64()
-        # ctypes.c_ushort(514) = MAKE_WORD(2,2) which is for the winsock
-        # library version 2.2
-        errcode = WSAStartup(ctypes.c_ushort(514), ctypes.pointer(wsa_data))
-        if errcode != 0:
-            raise WindowsSocketException(errcode)
+        _ensure_wsa_started()
 
         fd = socket(self.AF_UNIX, self.SOCK_STREAM, 0)
         self._checkReturnCode(fd)
         self.fd = fd
+        # Receive buffer reused across recv() calls, grown on demand. Like the
+        # rest of this class, it is not safe to share between threads.
+        self._rxbuf = None
+        self._rxcap = 0
+        self._setBufferSizes()
+
+    def _setBufferSizes(self):
+        # type: () -> None
+        try:
+            size = int(
+                os.environ.get(
+                    "EDEN_THRIFT_SOCKET_BUFFER_SIZE", DEFAULT_SOCKET_BUFFER_SIZE
+                )
+            )
+        except ValueError:
+            size = DEFAULT_SOCKET_BUFFER_SIZE
+        if size <= 0:
+            return
+        value = ctypes.wintypes.DWORD(size)
+        # This is only a hint: AF_UNIX sockets may not honor these options, in
+        # which case we keep the defaults instead of failing the connection.
+        for option in (SO_SNDBUF, SO_RCVBUF):
+            WinSetIntSockOpt(
+                self.fd, SOL_SOCKET, option, ctypes.byref(value), ctypes.sizeof(value)
+            )
 
     def fileno(self):
         # type: () -> int
         return self.fd
 
-    def settimeout(self, timeout):
-        # type: (int) -> None
+    def settimeout(
+        self, timeout, _setsockopt=WinSetIntSockOpt, _check=_check_return_code
+    ):
+        # type: (int, Any, Any) -> None
         timeout = ctypes.wintypes.DWORD(0 if timeout is None else int(timeout * 1000))
-        retcode = WinSetIntSockOpt(
+        retcode = _setsockopt(
             self.fd,
             SOL_SOCKET,
             SO_RCVTIMEO,
             ctypes.byref(timeout),
             ctypes.sizeof(timeout),
         )
-        self._checkReturnCode(retcode)
-        retcode = WinSetIntSockOpt(
+        _check(retcode)
+        retcode = _setsockopt(
             self.fd,
             SOL_SOCKET,
             SO_SNDTIMEO,
             ctypes.byref(timeout),
             ctypes.sizeof(timeout),
         )
-        self._checkReturnCode(retcode)
+        _check(retcode)
         return None
 
-    def connect(self, address):
-        # type: (str) -> None
+    def connect(self, address, _connect=connect, _check=_check_return_code):
+        # type: (str, Any, Any) -> None
         addr = SOCKADDR_UN(sun_family=self.AF_UNIX, sun_path=address.encode("utf-8"))
-        self._checkReturnCode(
-            connect(self.fd, ctypes.pointer(addr), ctypes.sizeof(addr))
-        )
+        _check(_connect(self.fd, ctypes.pointer(addr), ctypes.sizeof(addr)))
         self.address = address
 
-    def send(self, buff):
-        # type: (bytes) -> int
-        retcode = send(self.fd, buff, len(buff), 0)
-        self._checkReturnCode(retcode)
+    def send(self, buff, _send=send, _check=_check_return_code):
+        # type: (bytes, Any, Any) -> int
+        retcode = _send(self.fd, buff, len(buff), 0)
+        _check(retcode)
         return retcode
 
-    def sendall(self, buff):
-        # type: (bytes) -> None
-        while len(buff) > 0:
-            x = self.send(buff)
-            if x > 0:
-                buff = buff[x:]
+    @staticmethod
+    def _bufferAddress(buff):
+        # type: (Union[bytes, bytearray, memoryview]) -> Tuple[int, object]
+        """Return the address of buff's data and an object that must be kept
+        alive for as long as that address is used.
+
+        bytes and writable buffers are used in place; any other read-only
+        buffer is copied into a bytes object once.
+        """
+        if not isinstance(buff, bytes):
+            view = memoryview(buff).cast("B")
+            if view.readonly:
+                buff = view.tobytes()
             else:
+                array = (ctypes.c_char * view.nbytes).from_buffer(view)
+                return ctypes.addressof(array), array
+        return ctypes.cast(ctypes.c_char_p(buff), ctypes.c_void_p).value, buff
+
+    def sendall(self, buff, _wsasend=WSASend, _check=_check_return_code):
+        # type: (Union[bytes, bytearray, memoryview], Any, Any) -> None
+        # Hand the whole message to WSASend at once. On a blocking socket this
+        # normally completes in a single call; on a short write we advance a
+        # pointer into buff rather than slicing off a new copy of the rest.
+        total = memoryview(buff).nbytes
+        if total == 0:
+            return None
+        base, _keepalive = self._bufferAddress(buff)
+        wsabuf = WSABUF()
+        sent = ctypes.wintypes.DWORD(0)
+        offset = 0
+        while offset < total:
+            wsabuf.len = total - offset
+            wsabuf.buf = base + offset
+            retcode = _wsasend(
+                self.fd, ctypes.byref(wsabuf), 1, ctypes.byref(sent), 0, None, None
+            )
+            _check(retcode)
+            if sent.value <= 0:
                 break
+            offset += sent.value
         return None
 
-    def recv(self, size):
-        # type: (int) -> bytes
-        buff = ctypes.create_string_buffer(size)
-        retsize = recv(self.fd, buff, size, 0)
-        self._checkReturnCode(retsize)
-        return buff.raw[0:retsize]
+    def recv(
+        self,
+        size,
+        _recv=recv,
+        _check=_check_return_code,
+        _string_at=ctypes.string_at,
+    ):
+        # type: (int, Any, Any, Any) -> bytes
+        if size > self._rxcap:
+            self._rxbuf = ctypes.create_string_buffer(size)
+            self._rxcap = size
+        buff = self._rxbuf
+        retsize = _recv(self.fd, buff, size, 0)
+        _check(retsize)
+        # Only copy out the bytes that were actually received.
+        return _string_at(buff, retsize)
 
     def getpeername(self):
         # type: () -> str
@@ -234,9 +361,9 @@ class WindowsSocketHandle(object):
         # type: () -> str
         return self.address
 
-    def close(self):
-        # type: () -> int
-        return closesocket(self.fd)
+    def close(self, _closesocket=closesocket):
+        # type: (Any) -> int
+        return _closesocket(self.fd)
 
 
 class WinTSocket(TSocket):
@@ -37,6 +37,14 @@ def _fixsys():
     for candidate in [libdir, os.path.join(libdir, "build")]:
         depspath = os.path.join(candidate, name)
         if os.path.exists(depspath) and depspath not in sys.path:
+            # Register the zip importer up front so the import system does
+            # not have to probe sys.path_hooks for this entry on first use.
+            import zipimport
+
+            try:
+                sys.path_importer_cache[depspath] = zipimport.zipimporter(depspath)
+            except zipimport.ZipImportError:
+                pass
             sys.path.insert(0, depspath)
 
     # Make sure "edenscmnative" can be imported. Error early.
@@ -63,7 +71,12 @@ def run(args=None, fin=None, fout=None, ferr=None):
     if args is None:
         args = sys.argv
 
-    if args[1:4] == ["serve", "--cmdserver", "chgunix2"]:
+    if (
+        len(args) >= 4
+        and args[1] == "serve"
+        and args[2] == "--cmdserver"
+        and args[3] == "chgunix2"
+    ):
         # chgserver code path
 
         # no demandimport, since chgserver wants to preimport everything.
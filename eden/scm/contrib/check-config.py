@@ -17,134 +17,146 @@ import re
 import sys
 
 
-foundopts = {}
-documented = {}
-allowinconsistent = set()
-
 configre = re.compile(
     r"""
     # Function call
-    ui\.config(?P<ctype>|int|bool|list)\(
-        # First argument.
-        ['"](?P<section>\S+)['"],\s*
-        # Second argument
-        ['"](?P<option>\S+)['"](,\s+
-        (?:default=)?(?P<default>\S+?))?
-    \)""",
-    re.VERBOSE | re.MULTILINE,
-)
-
-configwithre = re.compile(
-    """
-    ui\.config(?P<ctype>with)\(
-        # First argument is callback function. This doesn't parse robustly
-        # if it is e.g. a function call.
-        [^,]+,\s*
+    ui\.config(?P<ctype>|int|bool|list|(?P<with>with))\(
+        # For configwith, the first argument is a callback function. This
+        # doesn't parse robustly if it is e.g. a function call.
+        (?(with)[^,]+,\s*)
+        # Section argument.
         ['"](?P<section>\S+)['"],\s*
+        # Option argument
         ['"](?P<option>\S+)['"](,\s+
         (?:default=)?(?P<default>\S+?))?
     \)""",
-    re.VERBOSE | re.MULTILINE,
+    re.VERBOSE | re.MULTILINE | re.ASCII,
 )
 
-configpartialre = r"""ui\.config"""
-
 ignorere = re.compile(
     r"""
     \#\s(?P<reason>internal|experimental|deprecated|developer|inconsistent)\s
     config:\s(?P<config>\S+\.\S+)$
     """,
-    re.VERBOSE | re.MULTILINE,
+    re.VERBOSE | re.MULTILINE | re.ASCII,
 )
 
+# Patterns applied to every line of every file
+topicre = re.compile(r"\s*``(\S+)``", re.ASCII)
+underlinere = re.compile(r"^\s*-+$", re.ASCII)
+docsectionre = re.compile(r"^\s+\[(\S+)\]", re.ASCII)
+docoptionre = re.compile(r"^\s+(?:#\s*)?(\S+) = ", re.ASCII)
+dottednamere = re.compile(r"^\s*(\S+\.\S+)$", re.ASCII)
+fieldnamere = re.compile(r"^\s*:(\S+\.\S+):\s+", re.ASCII)
+quotednamere = re.compile(r".*?``(\S+\.\S+)``", re.ASCII)
+variablere = re.compile(r"[a-z.]+$")
+
 
 def main(args):
+    foundopts = {}
+    documented = {}
+    allowinconsistent = set()
+
     for f in args:
         sect = ""
         prevname = ""
         confsect = ""
         carryover = ""
         linenum = 0
-        for l in open(f):
-            linenum += 1
-
-            # check topic-like bits
-            m = re.match("\s*``(\S+)``", l)
-            if m:
-                prevname = m.group(1)
-            if re.match("^\s*-+$", l):
-                sect = prevname
-                prevname = ""
-
-            if sect and prevname:
-                name = sect + "." + prevname
-                documented[name] = 1
-
-            # check docstring bits
-            m = re.match(r"^\s+\[(\S+)\]", l)
-            if m:
-                confsect = m.group(1)
-                continue
-            m = re.match(r"^\s+(?:#\s*)?(\S+) = ", l)
-            if m:
-                name = confsect + "." + m.group(1)
-                documented[name] = 1
-
-            # like the bugzilla extension
-            m = re.match(r"^\s*(\S+\.\S+)$", l)
-            if m:
-                documented[m.group(1)] = 1
-
-            # like convert
-            m = re.match(r"^\s*:(\S+\.\S+):\s+", l)
-            if m:
-                documented[m.group(1)] = 1
-
-            # quoted in help or docstrings
-            m = re.match(r".*?``(\S+\.\S+)``", l)
-            if m:
-                documented[m.group(1)] = 1
-
-            # look for ignore markers
-            m = ignorere.search(l)
-            if m:
-                if m.group("reason") == "inconsistent":
-                    allowinconsistent.add(m.group("config"))
-                else:
-                    documented[m.group("config")] = 1
-
-            # look for code-like bits
-            line = carryover + l
-            m = configre.search(line) or configwithre.search(line)
-            if m:
-                ctype = m.group("ctype")
-                if not ctype:
-                    ctype = "str"
-                name = m.group("section") + "." + m.group("option")
-                default = m.group("default")
-                if default in (None, "False", "None", "0", "[]", '""', "''"):
-                    default = ""
-                if re.match("[a-z.]+$", default):
-                    default = "<variable>"
-                if (
-                    name in foundopts
-                    and (ctype, default) != foundopts[name]
-                    and name not in allowinconsistent
-                ):
-                    print(l.rstrip())
-                    print(
-                        "conflict on %s: %r != %r"
-                        % (name, (ctype, default), foundopts[name])
-                    )
-                    print("at %s:%d:" % (f, linenum))
-                foundopts[name] = (ctype, default)
-                carryover = ""
-            else:
-                m = re.search(configpartialre, line)
+        with open(f) as fh:
+            for l in fh:
+                linenum += 1
+
+                # Most lines match none of the patterns below, so each one is
+                # guarded by a cheap substring test for text it cannot match
+                # without.
+                hasquotes = "``" in l
+                hasdot = "." in l
+
+                # check topic-like bits
+                if hasquotes:
+                    m = topicre.match(l)
+                    if m:
+                        prevname = m.group(1)
+                if "-" in l and underlinere.match(l):
+                    sect = prevname
+                    prevname = ""
+
+                if sect and prevname:
+                    name = sect + "." + prevname
+                    documented[name] = 1
+
+                # check docstring bits
+                if "[" in l:
+                    m = docsectionre.match(l)
+                    if m:
+                        confsect = m.group(1)
+                        continue
+                if " = " in l:
+                    m = docoptionre.match(l)
+                    if m:
+                        name = confsect + "." + m.group(1)
+                        documented[name] = 1
+
+                if hasdot:
+                    # like the bugzilla extension
+                    m = dottednamere.match(l)
+                    if m:
+                        documented[m.group(1)] = 1
+
+                    # like convert
+                    if ":" in l:
+                        m = fieldnamere.match(l)
+                        if m:
+                            documented[m.group(1)] = 1
+
+                    # quoted in help or docstrings
+                    if hasquotes:
+                        m = quotednamere.match(l)
+                        if m:
+                            documented[m.group(1)] = 1
+
+                    # look for ignore markers
+                    if "config:" in l:
+                        m = ignorere.search(l)
+                        if m:
+                            if m.group("reason") == "inconsistent":
+                                allowinconsistent.add(m.group("config"))
+                            else:
+                                documented[m.group("config")] = 1
+
+                # look for code-like bits
+                line = carryover + l
+                if "ui.config" not in line:
+                    carryover = ""
+                    continue
+                m = configre.search(line)
                 if m:
-                    carryover = line
-                else:
+                    ctype = m.group("ctype")
+                    if not ctype:
+                        ctype = "str"
+                    name = m.group("section") + "." + m.group("option")
+                    default = m.group("default")
+                    if default in (None, "False", "None", "0", "[]", '""', "''"):
+                        default = ""
+                    if variablere.match(default):
+                        default = "<variable>"
+                    if (
+                        name in foundopts
+                        and (ctype, default) != foundopts[name]
+                        and name not in allowinconsistent
+                    ):
+                        print(l.rstrip())
+                        print(
+                            "conflict on %s: %r != %r"
+                            % (name, (ctype, default), foundopts[name])
+                        )
+                        print("at %s:%d:" % (f, linenum))
+                    foundopts[name] = (ctype, default)
                     carryover = ""
+                else:
+                    # The call continues on the next line.
+                    carryover = line
 
     for name in sorted(foundopts):
         if name not in documented:
@@ -165,4 +177,4 @@ if __name__ == "__main__":
     if len(sys.argv) > 1:
         sys.exit(main(sys.argv[1:]))
     else:
-        sys.exit(main([l.rstrip() for l in sys.stdin]))
+        sys.exit(main(l.rstrip() for l in sys.stdin))
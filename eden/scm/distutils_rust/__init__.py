@@ -16,6 +16,7 @@ import distutils.core
 import distutils.errors
 import distutils.util
 import errno
+import hashlib
 import os
 import shutil
 import subprocess
@@ -24,6 +25,12 @@ import tempfile
 import time
 
 
+# The platform being built for. This does not change during a build, so look
+# it up once rather than every time an output file name is needed.
+PLATFORM = distutils.util.get_platform()
+IS_WINDOWS = PLATFORM.startswith("win-")
+IS_MACOS = PLATFORM.startswith("macosx")
+
 # This manifest is merged with the default .exe manifest to allow
 # it to support long paths on Windows
 LONG_PATHS_MANIFEST = """\
@@ -68,26 +75,15 @@ class RustExtension(object):
         self.manifest = manifest or "Cargo.toml"
         self.type = "library"
         self.features = features
-
-    @property
-    def dstnametmp(self):
-        platform = distutils.util.get_platform()
-        if platform.startswith("win-"):
-            name = self.name + ".dll"
-        elif platform.startswith("macosx"):
-            name = "lib" + self.name + ".dylib"
-        else:
-            name = "lib" + self.name + ".so"
-        return name
-
-    @property
-    def dstname(self):
-        platform = distutils.util.get_platform()
-        if platform.startswith("win-"):
-            name = self.name + ".pyd"
+        if IS_WINDOWS:
+            self.dstnametmp = self.name + ".dll"
+            self.dstname = self.name + ".pyd"
+        elif IS_MACOS:
+            self.dstnametmp = "lib" + self.name + ".dylib"
+            self.dstname = self.name + ".so"
         else:
-            name = self.name + ".so"
-        return name
+            self.dstnametmp = "lib" + self.name + ".so"
+            self.dstname = self.name + ".so"
 
 
 class RustBinary(object):
@@ -106,22 +102,12 @@ class RustBinary(object):
         self.type = "binary"
         self.final_name = rename or name
         self.features = features
-
-    @property
-    def dstnametmp(self):
-        platform = distutils.util.get_platform()
-        if platform.startswith("win-"):
-            return self.name + ".exe"
-        else:
-            return self.name
-
-    @property
-    def dstname(self):
-        platform = distutils.util.get_platform()
-        if platform.startswith("win-"):
-            return self.final_name + ".exe"
+        if IS_WINDOWS:
+            self.dstnametmp = self.name + ".exe"
+            self.dstname = self.final_name + ".exe"
         else:
-            return self.final_name
+            self.dstnametmp = self.name
+            self.dstname = self.final_name
 
 
 class BuildRustExt(distutils.core.Command):
@@ -158,6 +144,7 @@ class BuildRustExt(distutils.core.Command):
         self.inplace = None
         self.long_paths_support = False
         self.features = None
+        self.vendored_crates_changed = True
 
     def finalize_options(self):
         self.set_undefined_options(
@@ -172,6 +159,14 @@ class BuildRustExt(distutils.core.Command):
         # write cargo config
         self.write_cargo_config()
 
+        vendoredhash = self.vendored_crates_hash()
+        vendoredhashpath = os.path.join(self.build_temp, "vendored-crates.hash")
+        try:
+            with open(vendoredhashpath) as f:
+                self.vendored_crates_changed = f.read() != vendoredhash
+        except IOError:
+            self.vendored_crates_changed = True
+
         # Build Rust extensions
         for target in self.distribution.rust_ext_modules:
             self.build_library(target)
@@ -180,6 +175,38 @@ class BuildRustExt(distutils.core.Command):
         for target in self.distribution.rust_ext_binaries:
             self.build_binary(target)
 
+        # Only record the vendored crates once every target has been built
+        # against them, so that an interrupted build regenerates all lock
+        # files again next time.
+        if vendoredhash is not None:
+            try:
+                os.makedirs(self.build_temp)
+            except OSError:
+                pass
+            with open(vendoredhashpath, "w") as f:
+                f.write(vendoredhash)
+
+    def vendored_crates_hash(self):
+        """Returns a fingerprint of the vendored crates, or None if crates are
+        not vendored.
+
+        Each vendored crate directory carries a .cargo-checksum.json, so the
+        names and modification times of those files are enough to notice that
+        the vendored crates have been updated.
+        """
+        vendored_path = self.rust_vendored_crate_path()
+        if not vendored_path or not os.path.isdir(vendored_path):
+            return None
+        h = hashlib.sha1(os.path.abspath(vendored_path).encode("utf-8"))
+        for name in sorted(os.listdir(vendored_path)):
+            checksumpath = os.path.join(vendored_path, name, ".cargo-checksum.json")
+            try:
+                mtime = os.stat(checksumpath).st_mtime_ns
+            except OSError:
+                mtime = -1
+            h.update(("%s:%d\n" % (name, mtime)).encode("utf-8"))
+        return h.hexdigest()
+
     def get_cargo_target(self):
         return os.environ.get("CARGO_TARGET_DIR") or os.path.abspath(
             os.path.join("build", "cargo-target")
@@ -259,6 +286,15 @@ replace-with = "vendored-sources"
         if os.name == "nt":
             config = config.replace("\\", "\\\\")
 
+        # Leave the file alone if it is already up to date, so its mtime does
+        # not change and trigger rebuilds in tools that watch it.
+        try:
+            with open(".cargo/config") as f:
+                if f.read() == config:
+                    return
+        except IOError:
+            pass
+
         try:
             os.mkdir(".cargo")
         except OSError as e:
@@ -270,9 +306,11 @@ replace-with = "vendored-sources"
     def build_target(self, target):
         """Build Rust target"""
         # Cargo.lock may become out-of-date and make complication fail if
-        # vendored crates are updated. Remove it so it can be re-generated.
+        # vendored crates are updated. Remove it so it can be re-generated,
+        # but keep it while the vendored crates are unchanged to avoid
+        # resolving every dependency again on each build.
         cargolockpath = os.path.join(os.path.dirname(target.manifest), "Cargo.lock")
-        if os.path.exists(cargolockpath):
+        if self.vendored_crates_changed and os.path.exists(cargolockpath):
             os.unlink(cargolockpath)
 
         paths = self.rust_binary_paths()
@@ -293,13 +331,16 @@ replace-with = "vendored-sources"
                 "compilation of Rust target '%s' failed" % target.name
             )
 
+        self.install_target(target)
+
+    def install_target(self, target):
+        """Copy a built Rust target into the build output directory"""
         src = os.path.join(self.get_cargo_target(), self.get_temp_output(target))
 
-        if (
-            target.type == "binary"
-            and distutils.util.get_platform().startswith("win-")
-            and self.long_paths_support
-        ):
+        # mt.exe edits the cargo output in place, so a binary that gets the
+        # long paths manifest must not share its inode with the installed copy.
+        postprocess = target.type == "binary" and IS_WINDOWS and self.long_paths_support
+        if postprocess:
             retry = 0
             while True:
                 try:
@@ -321,18 +362,40 @@ replace-with = "vendored-sources"
             os.makedirs(os.path.dirname(dest))
         except OSError:
             pass
-        desttmp = dest + ".tmp"
-        shutil.copy(src, desttmp)
-        shutil.move(desttmp, dest)
+        self.link_or_copy_file(src, dest, link=not postprocess)
 
         # Copy pdb debug info.
         pdbsrc = src[:-4] + ".pdb"
         if os.path.exists(pdbsrc):
             pdbdest = dest[:-4] + ".pdb"
-            shutil.copy(pdbsrc, pdbdest)
+            self.link_or_copy_file(pdbsrc, pdbdest)
+
+    def link_or_copy_file(self, src, dest, link=True):
+        """Atomically place a copy of src at dest.
+
+        The cargo target directory is normally on the same filesystem as the
+        build output, so unless link is False try a hard link first to avoid
+        copying the (possibly large) file, and fall back to a real copy
+        otherwise.
+        """
+        desttmp = dest + ".tmp"
+        try:
+            os.unlink(desttmp)
+        except OSError:
+            pass
+        linked = False
+        if link:
+            try:
+                os.link(src, desttmp)
+                linked = True
+            except OSError:
+                pass
+        if not linked:
+            shutil.copy(src, desttmp)
+        os.replace(desttmp, dest)
 
     def set_long_paths_manifest(self, fname):
-        if not distutils.util.get_platform().startswith("win-"):
+        if not IS_WINDOWS:
             # This only makes sense on Windows
             distutils.log.info(
                 "skipping set_long_paths_manifest call for %s "
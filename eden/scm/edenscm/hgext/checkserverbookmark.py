@@ -7,17 +7,40 @@
 # it to be on a server
 from __future__ import absolute_import
 
-from edenscm.mercurial import error, hg
+from edenscm.mercurial import error, hg, registrar
 from edenscm.mercurial.commands import command
 from edenscm.mercurial.i18n import _
 from edenscm.mercurial.node import hex
 
 
+configtable = {}
+configitem = registrar.configitem(configtable)
+
+# If set (e.g. "60s"), and ui.ssh is the plain default, connect with ssh
+# connection multiplexing so that later ssh connections to the same host,
+# including ones from subsequent invocations, reuse the established channel.
+configitem("checkserverbookmark", "sshcontrolpersist", default=None)
+
+
 def getremote(ui, path):
+    _setupsshmultiplexing(ui)
     remote = hg.peer(ui, {}, path)
     return remote
 
 
+def _setupsshmultiplexing(ui):
+    persist = ui.config("checkserverbookmark", "sshcontrolpersist")
+    if not persist or ui.config("ui", "ssh") != "ssh":
+        return
+    ui.setconfig(
+        "ui",
+        "ssh",
+        "ssh -o ControlMaster=auto -o ControlPath=~/.ssh/cm-%%r@%%h:%%p "
+        "-o ControlPersist=%s" % persist,
+        "checkserverbookmark",
+    )
+
+
 def runlookup(ui, remote, name):
     return remote.lookup(name)
 
@@ -26,42 +49,111 @@ def runlistkeys(ui, remote):
     return remote.listkeys("bookmarks")
 
 
-def verifyexisting(ui, remote, name, hash):
-    location = hex(runlookup(ui, remote, name))
-    if location.strip() != hash.strip():
-        ui.warn(
-            _(
-                "hg server does not have an expected bookmark location. "
-                + "book: %s, server: %s; expected %s\n"
-            )
-            % (name, location, hash)
-        )
-        return 1
-    ui.warn(
-        _("hg server has expected bookmark location. book: %s, hash: %s\n")
-        % (name, hash)
-    )
-    return 0
+def verifyexisting(ui, remote, expected):
+    """Check that each (name, hash) pair in `expected` matches the server
 
+    All bookmarks are fetched with a single listkeys call, so checking many
+    bookmarks costs one round trip. Names that are not regular bookmarks
+    (e.g. scratch bookmarks) are resolved with an extra lookup call each.
 
-def verifydeleted(ui, remote, name):
+    A name the server cannot resolve aborts when it is the only one being
+    checked; otherwise it is reported as a mismatch and the remaining
+    bookmarks are still checked.
+    """
     serverkeys = runlistkeys(ui, remote)
-    if name in serverkeys:
+    result = 0
+    for name, hash in expected:
+        location = serverkeys.get(name)
+        if location is None:
+            try:
+                location = hex(runlookup(ui, remote, name))
+            except error.RepoError:
+                if len(expected) == 1:
+                    raise
+                ui.warn(
+                    _(
+                        "hg server does not have an expected bookmark. "
+                        + "book: %s; expected %s\n"
+                    )
+                    % (name, hash)
+                )
+                result = 1
+                continue
+        if location.strip() != hash.strip():
+            ui.warn(
+                _(
+                    "hg server does not have an expected bookmark location. "
+                    + "book: %s, server: %s; expected %s\n"
+                )
+                % (name, location, hash)
+            )
+            result = 1
+            continue
         ui.warn(
-            _("hg server has bookmark, which is expected to have been deleted: %s\n")
-            % (name,)
+            _("hg server has expected bookmark location. book: %s, hash: %s\n")
+            % (name, hash)
         )
-        return 1
-    ui.warn(_("hg server expectedly does not have a bookmark: %s\n") % (name,))
-    return 0
+    return result
+
+
+def verifydeleted(ui, remote, names):
+    serverkeys = runlistkeys(ui, remote)
+    result = 0
+    for name in names:
+        if name in serverkeys:
+            ui.warn(
+                _(
+                    "hg server has bookmark, which is expected to have been deleted: %s\n"
+                )
+                % (name,)
+            )
+            result = 1
+            continue
+        ui.warn(_("hg server expectedly does not have a bookmark: %s\n") % (name,))
+    return result
+
+
+def readbookmarksfile(path, deleted):
+    """Parse the name<TAB>hash lines of a ``--from-file`` file
+
+    Blank lines are skipped. The hash is optional when checking for deleted
+    bookmarks.
+    """
+    pairs = []
+    with open(path) as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            fields = line.split("\t")
+            if len(fields) > 2 or (len(fields) == 1 and not deleted):
+                raise error.Abort(
+                    _("%s:%d: expected a bookmark name and a hash separated by a tab")
+                    % (path, lineno)
+                )
+            pairs.append((fields[0], fields[1] if len(fields) == 2 else None))
+    return pairs
 
 
 @command(
     "checkserverbookmark",
     [
         ("", "path", "", _("hg server remotepath (ssh)"), ""),
-        ("", "name", "", _("bookmark name to check"), ""),
-        ("", "hash", "", _("hash to verify against the bookmark"), ""),
+        ("", "name", [], _("bookmark name to check (can be repeated)"), ""),
+        (
+            "",
+            "hash",
+            [],
+            _("hash to verify against the bookmark (one per `--name`)"),
+            "",
+        ),
+        (
+            "",
+            "from-file",
+            "",
+            _("read further bookmarks to check from a file of name<TAB>hash lines"),
+            _("FILE"),
+        ),
         (
             "",
             "deleted",
@@ -73,19 +165,37 @@ def verifydeleted(ui, remote, name):
     norepo=True,
 )
 def checkserverbookmark(ui, **opts):
-    """Verify whether the bookmark on hg server points to a given hash"""
-    name = opts["name"]
+    """Verify whether the bookmark on hg server points to a given hash
+
+    ``--name`` can be given several times to check many bookmarks over a
+    single connection. With ``--hash``, each name is paired with the hash at
+    the same position.
+
+    ``--from-file`` adds the bookmarks listed in a file, one per line, as a
+    name and a hash separated by a tab. With ``--deleted`` only the name is
+    needed.
+    """
+    names = list(opts["name"])
     path = opts["path"]
-    hash = opts["hash"]
+    hashes = list(opts["hash"])
     deleted = opts["deleted"]
-    if hash and deleted:
+    if hashes and deleted:
         raise error.Abort("can't use `--hash` and `--deleted`")
 
-    if not (hash or deleted):
+    if opts["from_file"]:
+        for name, hash in readbookmarksfile(opts["from_file"], deleted):
+            names.append(name)
+            if not deleted:
+                hashes.append(hash)
+
+    if not (hashes or deleted):
         raise error.Abort("either `--hash` or `--deleted` should be used")
 
+    if hashes and len(hashes) != len(names):
+        raise error.Abort("`--hash` should be given once for each `--name`")
+
     remote = getremote(ui, path)
     if deleted:
-        return verifydeleted(ui, remote, name)
+        return verifydeleted(ui, remote, names)
     else:
-        return verifyexisting(ui, remote, name, hash)
+        return verifyexisting(ui, remote, list(zip(names, hashes)))
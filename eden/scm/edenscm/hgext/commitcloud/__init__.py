@@ -112,6 +112,10 @@ Configs::
     # Use EdenApi Uploads for uploading commit cloud commits during sync
     usehttpupload = True
 
+    # Upload commits with EdenApi Uploads in batches of at most this many
+    # commits, ancestors first. 0 uploads all commits in a single batch.
+    uploadbatchsize = 500
+
     # The command to download bundles from a backup bundle store
     # the command has to be a formatted string with params: 'filename' and 'handle'
     get_command = bundlefetcher -h {handle} -o {filename}
@@ -170,6 +174,7 @@ configitem("commitcloud", "unhydratedpullsizelimit", 5000)
 configitem("commitcloud", "sl_showremotebookmarks", False)
 configitem("commitcloud", "sl_showallbookmarks", False)
 configitem("commitcloud", "usehttpupload", False)
+configitem("commitcloud", "uploadbatchsize", 0)
 configitem(
     "commitcloud", "get_command", default="jf download --filepath {filename} {handle}"
 )
@@ -9,6 +9,24 @@ from edenscm.mercurial import node as nodemod, edenapi_upload
 from edenscm.mercurial.i18n import _, _n
 
 
+def _batches(revs, batchsize):
+    """Split revs into lists of at most batchsize revs
+
+    A batch size of 0 or less means everything is uploaded in one batch.
+    """
+    if batchsize <= 0:
+        yield revs
+        return
+    batch = []
+    for rev in revs:
+        batch.append(rev)
+        if len(batch) == batchsize:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
 def upload(repo, revs, force=False):
     """Upload draft commits using EdenApi Uploads
 
@@ -20,15 +38,9 @@ def upload(repo, revs, force=False):
     ui = repo.ui
 
     if revs is None:
-        heads = [ctx.node() for ctx in repo.set("heads(not public())")]
+        heads = list(repo.nodes("heads(not public())"))
     else:
-        heads = [
-            ctx.node()
-            for ctx in repo.set(
-                "heads((not public() & ::%ld))",
-                revs,
-            )
-        ]
+        heads = list(repo.nodes("heads((not public() & ::%ld))", revs))
     if not heads:
         ui.status(_("nothing to upload\n"), component="commitcloud")
         return [], []
@@ -59,15 +71,21 @@ def upload(repo, revs, force=False):
             component="commitcloud",
         )
 
+    # Ancestors first, so that each upload batch only depends on commits
+    # from the same or earlier batches.
     draftrevs = repo.changelog.torevset(
-        repo.dageval(lambda: ancestors(missingheads) & draft())
+        repo.dageval(lambda: ancestors(missingheads) & draft()), reverse=True
     )
 
-    newuploaded, failed = edenapi_upload.uploadhgchangesets(
-        repo,
-        draftrevs,
-        force,
-    )
+    newuploaded, failed = set(), set()
+    for batch in _batches(draftrevs, ui.configint("commitcloud", "uploadbatchsize")):
+        batchuploaded, batchfailed = edenapi_upload.uploadhgchangesets(
+            repo,
+            batch,
+            force,
+        )
+        newuploaded.update(batchuploaded)
+        failed.update(batchfailed)
 
     failednodes = {repo[r].node() for r in failed}
 
@@ -78,8 +96,14 @@ def upload(repo, revs, force=False):
     #  │
     #  @  5e4faf031 (uploaded)
 
-    uploadedheads = list(
-        repo.nodes("heads(%ld) + %ln - heads(%ln)", newuploaded, heads, failednodes)
+    # This is "heads(newuploaded) + heads - heads(failednodes)", computed on
+    # the nodes we already have. Nothing in newuploaded failed, and a failed
+    # commit in heads has no draft descendants, so it is one of
+    # heads(failednodes); dropping failednodes from heads is therefore enough.
+    uploadedheads = list(repo.nodes("heads(%ld)", newuploaded)) if newuploaded else []
+    seen = set(uploadedheads)
+    uploadedheads.extend(
+        node for node in heads if node not in seen and node not in failednodes
     )
 
     return uploadedheads, failednodes
@@ -171,9 +171,8 @@ def _gettrees(repo, nodes):
 
 def _torevs(repo, uploadednodes, failednodes):
     """Convert nodes back to revs"""
-    return set([repo[node].rev() for node in uploadednodes]), set(
-        [repo[node].rev() for node in failednodes]
-    )
+    torev = repo.changelog.rev
+    return set(map(torev, uploadednodes)), set(map(torev, failednodes))
 
 
 def filetypefromfile(f):
@@ -197,7 +196,7 @@ def parentsfromctx(ctx):
 
 
 def uploadhgchangesets(repo, revs, force=False):
-    """Upload list of revs via EdenApi Uploads protocol
+    """Upload revs via EdenApi Uploads protocol
 
     EdenApi Uploads API consists of the following:
 
@@ -225,7 +224,9 @@ def uploadhgchangesets(repo, revs, force=False):
     Returns newly uploaded revs and failed revs.
     """
 
-    nodes = [repo[r].node() for r in revs]
+    # revs may be any iterable, including a lazy smartset; it is consumed once.
+    tonode = repo.changelog.node
+    nodes = [tonode(r) for r in revs]
 
     # Build a queue of commits to upload
     uploadcommitqueue = nodes if force else _filtercommits(repo, nodes)
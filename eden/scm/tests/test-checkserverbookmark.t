@@ -51,3 +51,42 @@ Verify bookmark locations while not being in a repo
   $ hg checkserverbookmark --path ssh://user@dummy/server --name book1 --deleted
   hg server has bookmark, which is expected to have been deleted: book1
   [1]
+
+Verify several bookmarks over one connection
+  $ hg checkserverbookmark --path ssh://user@dummy/server --name book1 --hash cb9a9f314b8b07ba71012fcdbc544b5a4d82ff5b --name book2 --hash 177f92b773850b59254aa5e923436f921b55483b
+  hg server has expected bookmark location. book: book1, hash: cb9a9f314b8b07ba71012fcdbc544b5a4d82ff5b
+  hg server has expected bookmark location. book: book2, hash: 177f92b773850b59254aa5e923436f921b55483b
+  $ hg checkserverbookmark --path ssh://user@dummy/server --name book1 --hash d2ae7f538514cd87c17547b0de4cea71fe1af9fb --name book2 --hash 177f92b773850b59254aa5e923436f921b55483b
+  hg server does not have an expected bookmark location. book: book1, server: cb9a9f314b8b07ba71012fcdbc544b5a4d82ff5b; expected d2ae7f538514cd87c17547b0de4cea71fe1af9fb
+  hg server has expected bookmark location. book: book2, hash: 177f92b773850b59254aa5e923436f921b55483b
+  [1]
+  $ hg checkserverbookmark --path ssh://user@dummy/server --name book1 --name book2 --hash 177f92b773850b59254aa5e923436f921b55483b
+  abort: `--hash` should be given once for each `--name`
+  [255]
+  $ hg checkserverbookmark --path ssh://user@dummy/server --name nope --hash d2ae7f538514cd87c17547b0de4cea71fe1af9fb --name book2 --hash 177f92b773850b59254aa5e923436f921b55483b
+  hg server does not have an expected bookmark. book: nope; expected d2ae7f538514cd87c17547b0de4cea71fe1af9fb
+  hg server has expected bookmark location. book: book2, hash: 177f92b773850b59254aa5e923436f921b55483b
+  [1]
+  $ hg checkserverbookmark --path ssh://user@dummy/server --name nope --name book2 --deleted
+  hg server expectedly does not have a bookmark: nope
+  hg server has bookmark, which is expected to have been deleted: book2
+  [1]
+
+Read the bookmarks to check from a file
+  $ printf 'book1\tcb9a9f314b8b07ba71012fcdbc544b5a4d82ff5b\n\nbook2\t177f92b773850b59254aa5e923436f921b55483b\n' > bookmarks
+  $ hg checkserverbookmark --path ssh://user@dummy/server --from-file bookmarks
+  hg server has expected bookmark location. book: book1, hash: cb9a9f314b8b07ba71012fcdbc544b5a4d82ff5b
+  hg server has expected bookmark location. book: book2, hash: 177f92b773850b59254aa5e923436f921b55483b
+  $ hg checkserverbookmark --path ssh://user@dummy/server --name book2 --hash d2ae7f538514cd87c17547b0de4cea71fe1af9fb --from-file bookmarks
+  hg server does not have an expected bookmark location. book: book2, server: 177f92b773850b59254aa5e923436f921b55483b; expected d2ae7f538514cd87c17547b0de4cea71fe1af9fb
+  hg server has expected bookmark location. book: book1, hash: cb9a9f314b8b07ba71012fcdbc544b5a4d82ff5b
+  hg server has expected bookmark location. book: book2, hash: 177f92b773850b59254aa5e923436f921b55483b
+  [1]
+  $ printf 'nope\nbook2\n' > deleted
+  $ hg checkserverbookmark --path ssh://user@dummy/server --from-file deleted
+  abort: deleted:1: expected a bookmark name and a hash separated by a tab
+  [255]
+  $ hg checkserverbookmark --path ssh://user@dummy/server --from-file deleted --deleted
+  hg server expectedly does not have a bookmark: nope
+  hg server has bookmark, which is expected to have been deleted: book2
+  [1]
@@ -0,0 +1,58 @@
+#chg-compatible
+
+  $ configure modern
+
+Replace the EdenApi calls with fakes that treat every commit as missing on the
+server and print what each upload batch contains.
+
+  $ cat > $TESTTMP/fakeupload.py <<EOF
+  > from edenscm.hgext.commitcloud import upload
+  > from edenscm.mercurial import edenapi_upload, extensions
+  > def uisetup(ui):
+  >     extensions.wrapfunction(edenapi_upload, "_filtercommits", filtercommits)
+  >     extensions.wrapfunction(edenapi_upload, "uploadhgchangesets", uploadbatch)
+  >     extensions.wrapfunction(upload, "upload", uploadheads)
+  > def filtercommits(orig, repo, nodes):
+  >     return list(nodes)
+  > def uploadbatch(orig, repo, revs, force=False):
+  >     revs = list(revs)
+  >     repo.ui.status("uploading %s\n" % " ".join(repo[r].description() for r in revs))
+  >     return set(revs), set()
+  > def uploadheads(orig, repo, revs, force=False):
+  >     uploaded, failed = orig(repo, revs, force)
+  >     repo.ui.status("uploaded heads: %s\n" % " ".join(sorted(repo[n].description() for n in uploaded)))
+  >     return uploaded, failed
+  > EOF
+  $ setconfig extensions.fakeupload=$TESTTMP/fakeupload.py
+
+  $ newserver server
+  $ cd $TESTTMP
+  $ clone server client
+  $ cd client
+  $ drawdag <<EOS
+  > E
+  > |
+  > D F
+  > |/
+  > C
+  > |
+  > B
+  > |
+  > A
+  > EOS
+
+By default everything is uploaded in a single batch
+  $ hg cloud upload
+  commitcloud: head '[0-9a-f]{12}' hasn't been uploaded yet (re)
+  commitcloud: head '[0-9a-f]{12}' hasn't been uploaded yet (re)
+  uploading A B C D E F
+  uploaded heads: E F
+
+With a batch size, ancestors are uploaded in earlier batches than their descendants
+  $ hg cloud upload --config commitcloud.uploadbatchsize=2
+  commitcloud: head '[0-9a-f]{12}' hasn't been uploaded yet (re)
+  commitcloud: head '[0-9a-f]{12}' hasn't been uploaded yet (re)
+  uploading A B
+  uploading C D
+  uploading E F
+  uploaded heads: E F
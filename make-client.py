@@ -5,19 +5,22 @@
 # GNU General Public License version 2.
 
 # This script generates the `eden` CLI executable.
-# We use zipapp to bundle this as a single executable file.
+# We bundle this as a single executable zipapp file.
 # This script looks a bit complicated because the layout of
 # the python modules in the source tree doesn't match their
 # runtime names; we therefore massage them into the installation
 # image, and pull in a couple of third party dependencies from pypi.
 import argparse
+import concurrent.futures
+import hashlib
 import os
+import shlex
 import shutil
+import stat
 import subprocess
 import sys
 import tempfile
-import zipapp
-from pipes import quote as shellquote
+import zipfile
 
 
 # Where to find the eden OSS directory; it contains this script.
@@ -26,6 +29,9 @@ DEFAULT_OSS_DIR = os.path.abspath(os.path.dirname(__file__))
 # third party deps to include in the executable
 DEPS = ["future", "six", "toml"]
 
+# The entry point of the executable, as "module:function"
+MAIN = "eden.fs.cli.main:zipapp_main"
+
 # Source path to destination python module name.
 # The lhs of each tuple is the path in the eden tree where the
 # python sources are found, and the rhs is the destination path
@@ -37,23 +43,74 @@ MODULES = [
 ]
 
 
+# Directories that are dropped from the installation image.
+PRUNE_DIRS = {"__pycache__", "test", "tests"}
+
+# Files and directories in package metadata that hold the license, which
+# we must redistribute along with the package.
+LICENSE_PREFIXES = ("LICENSE", "LICENCE", "COPYING", "NOTICE")
+
+
+# Whether run_cmd echoes the commands it runs; see --quiet.
+ECHO_COMMANDS = True
+
+
 def run_cmd(cmd, env=None, cwd=None):
-    cmd_str = " ".join(shellquote(arg) for arg in cmd)
     env_extra = env or {}
-    env = os.environ.copy()
-    print(
-        "+ "
-        + " ".join(["%s=%s" % (k, shellquote(v)) for k, v in env_extra.items()])
-        + " "
-        + cmd_str
-    )
+    if ECHO_COMMANDS:
+        # Emit the whole line with a single write so that output from commands
+        # run on different threads does not interleave.
+        print(
+            "+ "
+            + "".join("%s=%s " % (k, shlex.quote(v)) for k, v in env_extra.items())
+            + " ".join(shlex.quote(arg) for arg in cmd)
+            + "\n",
+            end="",
+            flush=True,
+        )
     assert os.path.isfile(cmd[0]), cmd[0]
+    env = os.environ.copy()
     env.update(env_extra)
     subprocess.check_call(cmd, env=env, cwd=cwd)
 
 
-def generate_thrift_code(thrift_compiler, oss_dir, fb303_dir, gen_dir):
-    """Generate python thrift clients for a couple of things"""
+def thrift_cache_dir():
+    """Where generated thrift code is kept between builds"""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "eden", "thriftgen")
+
+
+def thrift_inputs_hash(thrift_compiler, thrift_files, gen_args):
+    """Hash everything the generated code depends on: the contents of the
+    thrift files, the options passed to the compiler and the identity of
+    the compiler binary itself"""
+    h = hashlib.sha1()
+    st = os.stat(thrift_compiler)
+    h.update(("%s\0%d\0%d\0" % (thrift_compiler, st.st_size, st.st_mtime_ns)).encode())
+    h.update("\0".join(gen_args).encode() + b"\0")
+    for t in thrift_files:
+        with open(t, "rb") as f:
+            data = f.read()
+        h.update(("%s\0%d\0" % (t, len(data))).encode())
+        h.update(data)
+    return h.hexdigest()
+
+
+def copy_tree_contents(src_dir, dest_dir):
+    """Copy the files under src_dir into dest_dir, merging with what is
+    already there"""
+    for root, _dirs, files in os.walk(src_dir):
+        dest_root = os.path.join(dest_dir, os.path.relpath(root, src_dir))
+        os.makedirs(dest_root, exist_ok=True)
+        for name in files:
+            shutil.copyfile(os.path.join(root, name), os.path.join(dest_root, name))
+
+
+def generate_thrift_code(thrift_compiler, oss_dir, fb303_dir, gen_dir, use_cache=True):
+    """Generate python thrift clients for a couple of things.
+
+    The output only depends on the thrift sources and the compiler, so it
+    is kept in a content addressed cache and reused by later builds."""
     fb303_include_dir = os.path.join(fb303_dir, "include", "thrift-files")
     thrift_files = [
         os.path.join(oss_dir, "eden/fs/config/eden_config.thrift"),
@@ -61,21 +118,74 @@ def generate_thrift_code(thrift_compiler, oss_dir, fb303_dir, gen_dir):
         os.path.join(fb303_include_dir, "fb303/thrift/fb303_core.thrift"),
         os.path.join(oss_dir, "eden/fs/inodes/overlay/overlay.thrift"),
     ]
-    for t in thrift_files:
-        run_cmd(
-            [
-                thrift_compiler,
-                "-I",
-                oss_dir,
-                "-I",
-                fb303_include_dir,
-                "-gen",
-                "py:new_style",
-                "-out",
-                gen_dir,
-                t,
-            ]
-        )
+    gen_args = ["-I", oss_dir, "-I", fb303_include_dir, "-gen", "py:new_style"]
+
+    def compile_thrift(out_dir, t):
+        run_cmd([thrift_compiler] + gen_args + ["-out", out_dir, t])
+
+    def compile_all(out_dir):
+        # The files are independent of each other, so run the compiler on
+        # all of them at once.
+        with concurrent.futures.ThreadPoolExecutor(len(thrift_files)) as executor:
+            list(executor.map(lambda t: compile_thrift(out_dir, t), thrift_files))
+
+    if not use_cache:
+        compile_all(gen_dir)
+        return
+
+    cache_root = thrift_cache_dir()
+    cached = os.path.join(
+        cache_root, thrift_inputs_hash(thrift_compiler, thrift_files, gen_args)
+    )
+    if not os.path.isdir(cached):
+        os.makedirs(cache_root, exist_ok=True)
+        # Generate next to the final location and rename it into place, so
+        # that an interrupted or concurrent build never sees a partial entry.
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=cache_root)
+        try:
+            compile_all(tmp)
+            os.rename(tmp, cached)
+        except OSError:
+            # Somebody else populated the entry first; use theirs.
+            if not os.path.isdir(cached):
+                raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+    copy_tree_contents(cached, gen_dir)
+
+
+def prune_metadata(metadata_dir):
+    """Remove a package's metadata, except for the license files that must
+    be shipped along with the package"""
+    kept = False
+    with os.scandir(metadata_dir) as entries:
+        for entry in entries:
+            if entry.name.upper().startswith(LICENSE_PREFIXES):
+                kept = True
+            elif entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path)
+            else:
+                os.unlink(entry.path)
+    if not kept:
+        os.rmdir(metadata_dir)
+
+
+def prune_image(instdir):
+    """Remove the parts of the installed packages that are never imported
+    by the CLI: package metadata other than the licenses, bundled test
+    suites and any bytecode caches.  This keeps the zipapp and its central
+    directory, which zipimport reads on every start, small"""
+    for root, dirs, _files in os.walk(instdir):
+        keep = []
+        for name in dirs:
+            path = os.path.join(root, name)
+            if name in PRUNE_DIRS:
+                shutil.rmtree(path)
+            elif root == instdir and name.endswith((".dist-info", ".egg-info")):
+                prune_metadata(path)
+            else:
+                keep.append(name)
+        dirs[:] = keep
 
 
 def copy_py(src_dir, instdir, dest_prefix):
@@ -83,36 +193,93 @@ def copy_py(src_dir, instdir, dest_prefix):
     installation image.  This function copies only python files
     from the source and places them under an alternative directory
     structure in the destination"""
-    for root, _dirs, files in os.walk(src_dir):
-        rel_root = os.path.relpath(root, src_dir)
-        for f in files:
-            if f.endswith(".py"):
-                dest_dir = os.path.join(instdir, dest_prefix)
-                if rel_root != ".":
-                    dest_dir = os.path.join(dest_dir, rel_root)
-                src_file_name = os.path.join(root, f)
-                dest_file_name = os.path.join(dest_dir, os.path.basename(f))
-                os.makedirs(dest_dir, exist_ok=True)
-                shutil.copyfile(src_file_name, dest_file_name)
-
-
-def find_site_packages(instdir):
-    """locate any and all site-packages directories in the install image"""
-    sp = []
-    for root, dirs, _files in os.walk(instdir):
-        for d in dirs:
-            if d == "site-packages":
-                sp.append(os.path.join(root, d))
-    return sp
+    created_dirs = set()
+
+    def copy_tree(src, dest_dir):
+        with os.scandir(src) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    # Skip whole subtrees that prune_image would remove anyway.
+                    if entry.name not in PRUNE_DIRS:
+                        copy_tree(entry.path, os.path.join(dest_dir, entry.name))
+                elif entry.name.endswith(".py"):
+                    if dest_dir not in created_dirs:
+                        os.makedirs(dest_dir, exist_ok=True)
+                        created_dirs.add(dest_dir)
+                    dest_file_name = os.path.join(dest_dir, entry.name)
+                    # Hard link when the image is on the same filesystem as
+                    # the sources; fall back to copying otherwise.
+                    try:
+                        os.link(entry.path, dest_file_name)
+                    except OSError:
+                        shutil.copyfile(entry.path, dest_file_name)
+
+    copy_tree(src_dir, os.path.join(instdir, dest_prefix))
+
+
+def zip_info(arcname, mode, compression):
+    """A ZipInfo that only depends on the name and permissions of the file,
+    not on when it was written"""
+    info = zipfile.ZipInfo(arcname, date_time=(1980, 1, 1, 0, 0, 0))
+    info.external_attr = (mode & 0xFFFF) << 16
+    info.compress_type = compression
+    return info
+
+
+def write_zipapp(source, target, interpreter, main, compressed):
+    """Like zipapp.create_archive, but controls the order of the members.
+
+    zipimport reads the central directory at the end of the archive and then
+    seeks back to each member it imports.  The modules needed to start the
+    CLI are therefore written last, next to the central directory; our own
+    package comes before them and third party dependencies first.
 
+    The archive is reproducible: members are written in sorted order within
+    each group and with fixed timestamps."""
+    mod, fn = main.split(":")
+    main_py = "# -*- coding: utf-8 -*-\nimport %s\n%s.%s()\n" % (mod, mod, fn)
 
-def move_site_packages_to_root(instdir):
-    """To reduce pythonpath headaches, after install packages from pip we
-    sweep them out of site-packages dirs and move them up to the root so
-    that they are reachable by the entrypoint in the zipapp"""
-    for sp in find_site_packages(instdir):
-        for child in os.listdir(sp):
-            os.rename(os.path.join(sp, child), os.path.join(instdir, child))
+    # The entry point module and the packages containing it.
+    mod_parts = mod.split(".")
+    bootstrap = {"/".join(mod_parts) + ext for ext in (".py", ".pyc")}
+    for i in range(1, len(mod_parts)):
+        for name in ("__init__.py", "__init__.pyc"):
+            bootstrap.add("/".join(mod_parts[:i] + [name]))
+
+    deps, ours, last = [], [], []
+    for root, dirs, files in os.walk(source):
+        # Walk in a fixed order so that the same image always produces the
+        # same archive.
+        dirs.sort()
+        for name in dirs + sorted(files):
+            path = os.path.join(root, name)
+            arcname = os.path.relpath(path, source).replace(os.sep, "/")
+            if arcname in bootstrap:
+                last.append((path, arcname))
+            elif arcname.split("/", 1)[0] == mod_parts[0]:
+                ours.append((path, arcname))
+            else:
+                deps.append((path, arcname))
+
+    compression = zipfile.ZIP_DEFLATED if compressed else zipfile.ZIP_STORED
+    with open(target, "wb") as fd:
+        fd.write(b"#!" + interpreter.encode(sys.getfilesystemencoding()) + b"\n")
+        with zipfile.ZipFile(fd, "w", compression=compression) as z:
+            for path, arcname in deps + ours + last:
+                st = os.stat(path)
+                if stat.S_ISDIR(st.st_mode):
+                    info = zip_info(arcname + "/", st.st_mode, compression)
+                    info.external_attr |= 0x10  # MS-DOS directory flag
+                    z.writestr(info, b"")
+                else:
+                    info = zip_info(arcname, st.st_mode, compression)
+                    with open(path, "rb") as src, z.open(info, "w") as dst:
+                        shutil.copyfileobj(src, dst)
+            z.writestr(
+                zip_info("__main__.py", stat.S_IFREG | 0o644, compression),
+                main_py.encode("utf-8"),
+            )
+    os.chmod(target, os.stat(target).st_mode | stat.S_IEXEC)
 
 
 parser = argparse.ArgumentParser()
@@ -128,6 +295,22 @@ parser.add_argument(
     default="eden.zip",
     help="The output file location (default=%(default)s)",
 )
+parser.add_argument(
+    "--compress",
+    action="store_true",
+    help="Deflate the archive contents. This makes the output smaller but "
+    "slows down every start of the CLI, so it is off by default",
+)
+parser.add_argument(
+    "-q", "--quiet", action="store_true", help="Do not echo the commands being run"
+)
+parser.add_argument(
+    "--no-thrift-cache",
+    dest="thrift_cache",
+    action="store_false",
+    help="Always run the thrift compiler instead of reusing previously "
+    "generated code",
+)
 parser.add_argument("--oss-dir", default=DEFAULT_OSS_DIR)
 parser.add_argument("--fb303-dir")
 parser.add_argument(
@@ -139,9 +322,16 @@ parser.add_argument(
     default=os.path.join(DEFAULT_OSS_DIR, "external/fbthrift/thrift/lib/py"),
 )
 args = parser.parse_args()
+ECHO_COMMANDS = not args.quiet
 
 with tempfile.TemporaryDirectory() as instdir:
-    generate_thrift_code(args.thrift_compiler, args.oss_dir, args.fb303_dir, instdir)
+    generate_thrift_code(
+        args.thrift_compiler,
+        args.oss_dir,
+        args.fb303_dir,
+        instdir,
+        use_cache=args.thrift_cache,
+    )
 
     for src_dir, dest_prefix in MODULES:
         copy_py(os.path.join(args.oss_dir, src_dir), instdir, dest_prefix)
@@ -149,17 +339,56 @@ with tempfile.TemporaryDirectory() as instdir:
     # And the python thrift runtime
     copy_py(args.thrift_py, instdir, "thrift")
 
-    for dep in DEPS:
-        # There's no supported way to call `pip` in process, so we just
-        # have to shell out and install it where we want it.
-        run_cmd([args.python, "-m", "pip", "install", dep, "--prefix", instdir])
+    # There's no supported way to call `pip` in process, so we just
+    # have to shell out and install the deps where we want them.  Do it
+    # in a single invocation so that pip only starts up and resolves once.
+    # --target puts the packages at the root of the image, where they are
+    # reachable by the entrypoint in the zipapp.
+    run_cmd(
+        [
+            args.python,
+            "-m",
+            "pip",
+            "install",
+            "--no-compile",
+            "--disable-pip-version-check",
+            "--no-input",
+            "--target",
+            instdir,
+        ]
+        + DEPS
+    )
+
+    prune_image(instdir)
 
-    move_site_packages_to_root(instdir)
+    # Byte-compile everything up front, so that the interpreter does not have
+    # to compile each module from the zip every time `eden` starts.  This
+    # must use the target interpreter so that the bytecode matches it.  The
+    # .pyc files are placed next to their sources (-b), which is where
+    # zipimport looks for them, and are hash-based and unchecked so that
+    # they do not depend on the timestamps recorded in the zip.
+    run_cmd(
+        [
+            args.python,
+            "-m",
+            "compileall",
+            "-q",
+            "-b",
+            "-j",
+            "0",
+            "--invalidation-mode",
+            "unchecked-hash",
+            instdir,
+        ]
+    )
 
     # Generate the `eden` executable zipfile.
-    zipapp.create_archive(
+    write_zipapp(
         instdir,
         target=args.output,
         interpreter=args.python,
-        main="eden.fs.cli.main:zipapp_main",
+        main=MAIN,
+        # Stored rather than deflated: the extra disk reads are cheaper than
+        # inflating each module on import.
+        compressed=args.compress,
     )